@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+from components.case_store import location_key
+
+# ------------- CONFIGURATION ----------------
+PHONE_BURST = 3  # submissions a number can make back to back
+PHONE_REFILL = 1 / 600  # tokens per second: one more every 10 minutes
+LOCATION_BURST = 200  # submissions about one place back to back
+LOCATION_REFILL = 1.0  # tokens per second per place
+MAX_BUCKETS = 100000  # buckets kept per kind; least recently used are dropped
+MAX_CONCURRENT = 8  # submissions in the pipeline at once
+
+
+class Decision(NamedTuple):
+    admitted: bool
+    reason: Optional[str] = None
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by string, refilled lazily on access.
+
+    Each bucket is a (tokens, last_refill) pair in an OrderedDict kept in
+    least-recently-used order, so memory is capped at `max_buckets` entries.
+    A dropped bucket comes back full, which only errs towards admitting.
+    """
+
+    def __init__(self, burst, refill, max_buckets=MAX_BUCKETS):
+        self.burst = burst
+        self.refill = refill
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def peek(self, key, now):
+        """Tokens available for key at time now, without taking any."""
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.refill)
+
+    def take(self, key, now):
+        tokens = self.peek(key, now)
+        if tokens < 1:
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return True
+
+
+def phone_key(phone_number):
+    # Last ten digits, so +91/0 prefixes and spacing map to one bucket
+    digits = "".join(c for c in phone_number or "" if c.isdigit())
+    return digits[-10:]
+
+
+def place_key(location):
+    # The same district key cases are grouped by, so "Lucknow", "lucknow city"
+    # and "Gomti Nagar, Lucknow" share one bucket
+    return " ".join(location_key(location).split())
+
+
+class AdmissionController:
+    """
+    Admission control in front of the intake pipeline.
+
+    A submission is admitted only if its phone number and its location both
+    have a token left and fewer than `max_concurrent` submissions are in the
+    pipeline; otherwise it is shed before any extraction, embedding or LLM
+    work. Empty numbers and locations are not rate limited. Admitted and shed
+    counts are kept per reason for tuning.
+    """
+
+    def __init__(
+        self,
+        phone_burst=PHONE_BURST,
+        phone_refill=PHONE_REFILL,
+        location_burst=LOCATION_BURST,
+        location_refill=LOCATION_REFILL,
+        max_buckets=MAX_BUCKETS,
+        max_concurrent=MAX_CONCURRENT,
+        clock=time.monotonic,
+    ):
+        self.phones = TokenBuckets(phone_burst, phone_refill, max_buckets)
+        self.locations = TokenBuckets(location_burst, location_refill, max_buckets)
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.counters = {
+            "admitted": 0,
+            "shed_phone": 0,
+            "shed_location": 0,
+            "shed_concurrency": 0,
+        }
+        self.in_flight = 0
+
+    def try_admit(self, phone_number=None, location=None) -> Decision:
+        """
+        Admit or shed one submission. An admitted submission holds a pipeline
+        slot until release() is called; prefer the admission() context manager.
+        """
+        phone = phone_key(phone_number)
+        place = place_key(location)
+        with self._lock:
+            now = self.clock()
+            # Check both before taking from either, so a shed call costs nothing
+            if phone and self.phones.peek(phone, now) < 1:
+                return self._shed("shed_phone", "Caller rate limit")
+            if place and self.locations.peek(place, now) < 1:
+                return self._shed("shed_location", "Location rate limit")
+            if not self._slots.acquire(blocking=False):
+                return self._shed("shed_concurrency", "Pipeline busy")
+            if phone:
+                self.phones.take(phone, now)
+            if place:
+                self.locations.take(place, now)
+            self.counters["admitted"] += 1
+            self.in_flight += 1
+        return Decision(True)
+
+    def _shed(self, counter, reason):
+        self.counters[counter] += 1
+        return Decision(False, reason)
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @contextmanager
+    def admission(self, phone_number=None, location=None):
+        """Yields a Decision; an admitted submission's slot is released on exit."""
+        decision = self.try_admit(phone_number, location)
+        try:
+            yield decision
+        finally:
+            if decision.admitted:
+                self.release()
+
+    def stats(self):
+        """Admitted/shed counters, submissions in flight and tracked buckets."""
+        with self._lock:
+            return dict(
+                self.counters,
+                shed=sum(v for k, v in self.counters.items() if k.startswith("shed")),
+                in_flight=self.in_flight,
+                phone_buckets=len(self.phones),
+                location_buckets=len(self.locations),
+            )
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Process-wide admission controller."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,272 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .input import AUDIO_AVAILABLE, FIELD_KEYS, ExtractionSession
+from .models import Grievance
+
+# ------------- CONFIGURATION ----------------
+STAGE_TIMEOUTS = {
+    "speak": 20.0,  # seconds to say one prompt
+    "listen": 30.0,  # seconds to capture and transcribe one answer
+    "extract": 20.0,  # seconds for one extraction turn (local + LLM)
+}
+MAX_TURNS = 12  # questions asked before giving up on a call
+ACKNOWLEDGEMENT = "Thank you."
+
+
+# ------------- Audio sources ----------------
+class MicrophoneSource:
+    """Caller speech from the microphone, transcribed with Google ASR."""
+
+    def __init__(self, pause_threshold=1.0, listen_timeout=10):
+        if not AUDIO_AVAILABLE:
+            raise RuntimeError("speech_recognition and pyttsx3 are required for live audio")
+        import speech_recognition as sr
+
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.microphone = sr.Microphone()
+        self.listen_timeout = listen_timeout
+        with self.microphone as source:
+            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+        self.recognizer.pause_threshold = pause_threshold
+
+    def listen(self) -> Optional[str]:
+        with self.microphone as source:
+            try:
+                audio = self.recognizer.listen(
+                    source, timeout=self.listen_timeout, phrase_time_limit=15
+                )
+                return self.recognizer.recognize_google(audio)
+            except (self.sr.WaitTimeoutError, self.sr.UnknownValueError):
+                return None
+            except self.sr.RequestError as e:
+                print(f"Speech recognition service error: {e}")
+                return None
+
+
+class FileSource:
+    """
+    Caller answers read from a file instead of a microphone, for tests and
+    replaying calls. A text file gives one utterance per line (blank lines are
+    "nothing heard"); a directory of audio files is transcribed in name order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.isdir(path):
+            self._items = [
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith((".wav", ".flac", ".aiff", ".aif"))
+            ]
+            self._audio = True
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                self._items = [line.strip() for line in f]
+            self._audio = False
+        self._next = 0
+
+    def listen(self) -> Optional[str]:
+        if self._next >= len(self._items):
+            return None
+        item = self._items[self._next]
+        self._next += 1
+        if not self._audio:
+            return item or None
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(item) as source:
+            audio = recognizer.record(source)
+        try:
+            return recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            print(f"Speech recognition service error: {e}")
+            return None
+
+
+# ------------- Speakers ----------------
+class TTSSpeaker:
+    """pyttsx3 text-to-speech. The engine is created on the TTS thread that uses it."""
+
+    def __init__(self):
+        if not AUDIO_AVAILABLE:
+            raise RuntimeError("speech_recognition and pyttsx3 are required for live audio")
+        self._engine = None
+
+    def speak(self, text):
+        if self._engine is None:
+            import pyttsx3
+
+            self._engine = pyttsx3.init()
+        self._engine.say(text)
+        self._engine.runAndWait()
+
+
+class SilentSpeaker:
+    """Speaks nothing; the agent still prints every prompt. For tests and replays."""
+
+    def speak(self, text):
+        pass
+
+
+# ------------- Agent ----------------
+class AsyncGrievanceAgent:
+    """
+    Conversational intake with the blocking stages run off the event loop.
+
+    Speaking, listening and extraction each run on their own single-thread
+    executor (the TTS and ASR engines are not thread-safe, and the session
+    must not be updated twice at once), so they can overlap: a caller's
+    answer is extracted while the acknowledgement is spoken, and the next
+    question is ready when it finishes. Every stage has a timeout
+    (STAGE_TIMEOUTS); a listen that times out counts as nothing heard and an
+    extraction that times out as not understood, so the question is asked
+    again. A timed-out call cannot be interrupted and keeps running in its
+    thread, so listening first waits until speaking has really finished (the
+    agent never transcribes itself) and an extraction waits for the previous
+    one. Cancelling run() stops waiting on whatever is in flight.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        speaker=None,
+        session_factory: Callable[[], ExtractionSession] = ExtractionSession,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_turns=MAX_TURNS,
+    ):
+        self.source = source or MicrophoneSource()
+        self.speaker = speaker or TTSSpeaker()
+        self.session_factory = session_factory
+        self.timeouts = dict(STAGE_TIMEOUTS, **(timeouts or {}))
+        self.max_turns = max_turns
+        self.session = None
+        self.transcript = []
+        self._executors = {
+            "speak": ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts"),
+            "listen": ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr"),
+            "extract": ThreadPoolExecutor(max_workers=1, thread_name_prefix="extract"),
+        }
+        self._running = {}  # stage name -> its latest concurrent.futures.Future
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def stage(self, name, func, *args):
+        """
+        Run a blocking call in the stage's executor; None if it times out.
+        The call itself keeps running after a timeout; see settle().
+        """
+        future = self._executors[name].submit(func, *args)
+        self._running[name] = future
+        try:
+            # Shielded, so a timeout leaves a queued call queued rather than
+            # dropping it (a prompt that is never spoken)
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self.timeouts[name]
+            )
+        except asyncio.TimeoutError:
+            print(f"[SYSTEM] {name} timed out after {self.timeouts[name]}s")
+            return None
+
+    async def settle(self, name):
+        """
+        Wait until the stage's last call has actually finished, even if it
+        timed out. Each stage has one thread, so every earlier call has too.
+        """
+        future = self._running.get(name)
+        if future is not None and not future.done():
+            print(f"[SYSTEM] waiting for the previous {name} to finish")
+            await asyncio.wait([asyncio.wrap_future(future)])
+
+    async def say(self, text):
+        print(f"\n[AGENT]: {text}")
+        self.transcript.append(("agent", text))
+        await self.stage("speak", self.speaker.speak, text)
+
+    async def hear(self):
+        # Never listen while the agent is still speaking
+        await self.settle("speak")
+        print("[LISTENING...]")
+        text = await self.stage("listen", self.source.listen)
+        if text:
+            print(f"[USER]: {text}")
+            self.transcript.append(("caller", text))
+        return text
+
+    async def extract(self, answer, question):
+        """Session update for one answer; None if it timed out."""
+        await self.settle("extract")
+        return await self.stage("extract", self.session.update, answer, question)
+
+    async def run(self) -> Optional[Grievance]:
+        """Run one call; returns the Grievance, or None if the call could not be completed."""
+        self.session = self.session_factory()
+        await self.say("1071, how can I help you?")
+        answer = await self.hear()
+        if not answer:
+            await self.say("It seems we got disconnected. Please try calling again. Goodbye.")
+            return None
+
+        data = await self.extract(answer, None)
+        if data is None:
+            # Not understood: fall back to asking for every field in turn
+            data = self.session.result(dict.fromkeys(FIELD_KEYS))
+        for _ in range(self.max_turns):
+            if "error" in data:
+                await self.say(
+                    "I'm having trouble connecting to my system. Please try again later."
+                )
+                return None
+
+            questions = data.get("questions", [])
+            if not questions:
+                await self.say(
+                    "Thank you. I have all the information I need. Your report has been filed."
+                )
+                return Grievance(
+                    caller_name=data.get("caller_name"),
+                    caller_phone_no=data.get("phone_number"),
+                    description=data.get("case_detail"),
+                    location=data.get("location"),
+                    date_time=data.get("report_datetime"),
+                )
+
+            question = questions[0]
+            await self.say(question)
+            answer = await self.hear()
+            if not answer:
+                await self.say("I didn't catch an answer. Let's try again.")
+                continue
+
+            # Extract the answer while the acknowledgement is being spoken
+            extraction = asyncio.create_task(self.extract(answer, question))
+            try:
+                await self.say(ACKNOWLEDGEMENT)
+                update = await extraction
+            finally:
+                extraction.cancel()
+            if update is None:
+                # Keep what we had and ask the same question again
+                await self.say("Sorry, I could not process that. Let me ask again.")
+                continue
+            data = update
+
+        await self.say("We could not complete your report. Please call again. Goodbye.")
+        return None
+
+
+def run_async_conversation(source=None, speaker=None, **kwargs) -> Optional[Grievance]:
+    """Run one call with AsyncGrievanceAgent on a fresh event loop."""
+    agent = AsyncGrievanceAgent(source=source, speaker=speaker, **kwargs)
+    try:
+        return asyncio.run(agent.run())
+    finally:
+        agent.close()
@@ -0,0 +1,864 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from components.categories import get_category_registry
+from components.gazetteer import get_gazetteer
+from components.models import CaseRecord
+from components.priority_index import PriorityIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writing process per journal
+    fcntl = None
+
+# ------------- CONFIGURATION ----------------
+CASE_STORE_BACKEND = os.getenv("MOSAIC_CASE_STORE", "json")  # "json" or "sqlite"
+SNAPSHOT_FILE = "data/test.json"
+JOURNAL_FILE = "data/test.journal.jsonl"
+SQLITE_FILE = "data/cases.db"
+SQLITE_SCHEMA_VERSION = 1  # bump when derived columns (e.g. location_key) change
+COMPACT_EVERY = 500  # journal records before folding them into the snapshot
+SQLITE_MAX_VARIABLES = 900  # ids bound per IN (...) query, under SQLite's limit
+
+
+def parse_timestamp(value):
+    """Parse a stored problem_start/date_time string into a datetime, or None."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+
+
+def location_key(location):
+    """Grouping key for a location: its UP district when recognised, else the text."""
+    try:
+        district = get_gazetteer().district(location)
+    except FileNotFoundError:
+        district = None
+    return (district or location or "").strip().lower()
+
+
+def needs_scoring(case):
+    """Whether a case's score predates its current thread (or it has none)."""
+    return case.get("score_threads") != len(case.get("thread", []))
+
+
+def copy_case(case):
+    """Copy of a case dict that callers may change without touching the store."""
+    return dict(case, thread=[dict(entry) for entry in case.get("thread", [])])
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on lock_path held against other processes."""
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield  # released when the file is closed
+
+
+def category_name(category):
+    """Department name of a case_category value: an id, a name or a legacy dict."""
+    try:
+        return get_category_registry().name(category)
+    except FileNotFoundError:
+        if isinstance(category, dict):
+            return category.get("name", "")
+        return category or ""
+
+
+class CaseStore:
+    """
+    Interface shared by the case archive backends.
+
+    Cases are plain dicts with the CaseRecord fields (plus "status"); thread
+    entries are dicts with the Grievance fields.
+
+    Stores also track which cases gained a thread entry or were added since
+    the last scoring pass ("dirty") and the running maximum thread length, so
+    scoring can rescore only what changed. The normalization and classifier
+    of the last pass are stored with the cases (scoring_state), and cases
+    loaded with a thread longer than their score counted start out dirty, so
+    a new process does not have to rescore the archive.
+    """
+
+    def __init__(self):
+        self._dirty = set()
+        self._max_thread_len = None
+        # (max thread length, classifier key) of the last scoring pass
+        self._scoring_state = (None, None)
+        self._priority_index = None
+
+    def cases(self):
+        """Return every case dict."""
+        raise NotImplementedError
+
+    def _iter_cases(self):
+        # Read-only view for internal scans; backends may skip copying
+        return self.cases()
+
+    def get(self, case_no):
+        """Return a single case dict by case number, or None."""
+        raise NotImplementedError
+
+    def get_many(self, case_nos):
+        """Case dicts for several case numbers, skipping unknown ones."""
+        return [case for case in map(self.get, case_nos) if case is not None]
+
+    def get_record(self, case_no):
+        """Return a case as a CaseRecord, or None."""
+        case = self.get(case_no)
+        return None if case is None else CaseRecord.from_dict(case)
+
+    def add_case(self, case):
+        """Add a new case to the archive."""
+        raise NotImplementedError
+
+    def append_thread(self, case_no, entry):
+        """Append a grievance entry to an existing case's thread."""
+        raise NotImplementedError
+
+    def add_batch(self, new_cases, thread_entries):
+        """Add new cases and append (case_no, entry) pairs to existing ones."""
+        for case in new_cases:
+            self.add_case(case)
+        for case_no, entry in thread_entries:
+            self.append_thread(case_no, entry)
+
+    def update_case(self, case_no, fields):
+        """Overwrite the given top-level fields of a case."""
+        self.update_many({case_no: fields})
+
+    def update_many(self, updates):
+        """Overwrite fields on several cases at once: {case_no: {field: value}}."""
+        raise NotImplementedError
+
+    # --------- Change tracking ---------------
+    def _touch(self, case_no, thread_len):
+        self._dirty.add(case_no)
+        if self._max_thread_len is not None:
+            self._max_thread_len = max(self._max_thread_len, thread_len)
+
+    def dirty_case_nos(self):
+        """Case numbers added or appended to since they were last marked clean."""
+        return set(self._dirty)
+
+    def mark_clean(self, case_nos):
+        self._dirty.difference_update(case_nos)
+
+    def scoring_state(self):
+        """
+        (max thread length, classifier key) the stored scores were computed
+        with; (None, None) if unknown, which forces a full pass.
+        """
+        return self._scoring_state
+
+    def save_scoring_state(self, max_thread_len, model_key):
+        self._scoring_state = (max_thread_len, model_key)
+
+    def max_thread_len(self):
+        """Longest thread in the archive, maintained incrementally."""
+        if self._max_thread_len is None:
+            self._max_thread_len = max(
+                (len(case["thread"]) for case in self._iter_cases()), default=0
+            )
+        return self._max_thread_len
+
+    # --------- Priority index ---------------
+    def priority_index(self):
+        """PriorityIndex over the open scored cases, built on first use."""
+        if self._priority_index is None:
+            index = PriorityIndex()
+            for case in self._iter_cases():
+                self._index_case(index, case)
+            self._priority_index = index
+        return self._priority_index
+
+    def _index_case(self, index, case):
+        index.update(
+            case["case_no"],
+            category_name(case.get("case_category")),
+            case.get("score"),
+            case.get("status", "open"),
+        )
+
+    def _reindex(self, case):
+        # Keep an already built index current; called by the backends on every write
+        if self._priority_index is not None:
+            self._index_case(self._priority_index, case)
+
+    def top_k(self, department=None, k=20):
+        """The k highest-scoring open cases, optionally for one department."""
+        found = self.priority_index().top_k(department, k)
+        return self.get_many([case_no for case_no, _ in found])
+
+    def iter_priority(self, department=None):
+        """Open cases, highest score first, read from the priority index."""
+        for case_no, _ in self.priority_index().iter_cases(department):
+            case = self.get(case_no)
+            if case is not None:
+                yield case
+
+    def candidates(self, location, start, end):
+        """Cases at a location whose problem_start falls within [start, end]."""
+        key = location_key(location)
+        found = []
+        for case in self.cases():
+            if location_key(case["location"]) != key:
+                continue
+            case_date = parse_timestamp(case["problem_start"])
+            if case_date is not None and start <= case_date <= end:
+                found.append(case)
+        return found
+
+    def by_department(self, department):
+        """Cases assigned to the named department."""
+        return [
+            case
+            for case in self.cases()
+            if category_name(case.get("case_category")) == department
+        ]
+
+    def by_priority(self, limit=None, department=None, status="open"):
+        """Cases ordered by descending score, optionally filtered."""
+        if status == "open":
+            if limit is None:
+                return list(self.iter_priority(department))
+            return self.top_k(department, limit)
+        found = [
+            case
+            for case in self.cases()
+            if (status is None or case.get("status", "open") == status)
+            and (
+                department is None
+                or category_name(case.get("case_category")) == department
+            )
+        ]
+        found.sort(key=lambda case: case.get("score") or 0, reverse=True)
+        return found if limit is None else found[:limit]
+
+    def import_json(self, file_path):
+        """Load every case from a JSON list file into this store."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        known = {case["case_no"] for case in self.cases()}
+        for case in data:
+            if case["case_no"] in known:
+                self.update_case(case["case_no"], case)
+            else:
+                self.add_case(case)
+        return len(data)
+
+    def export_json(self, file_path):
+        """Write every case to a JSON list file in the data/test.json format."""
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cases(), f)
+        os.replace(tmp_path, file_path)
+
+
+class JournaledCaseStore(CaseStore):
+    """
+    Case archive kept as a JSON snapshot plus an append-only journal.
+
+    Every change (new case, new thread entry, field update) is written as one
+    JSON line to the journal, so ingesting a grievance costs O(1) I/O instead
+    of rewriting the whole archive. The journal is periodically compacted
+    back into the snapshot, which stays a plain list of case dicts.
+
+    Journal records are idempotent so a crash between writing the snapshot and
+    truncating the journal never applies a change twice. Appends and
+    compaction hold an flock on "<journal>.lock", so a compaction never
+    truncates records another process appended after its snapshot. Thread entries carry
+    an "entry_id" assigned at append time, so entries appended concurrently
+    by different writers are all kept and a replayed one is skipped.
+    """
+
+    def __init__(self, snapshot_path=None, journal_path=None, compact_every=None):
+        super().__init__()
+        path = os.getcwd()
+        self.snapshot_path = snapshot_path or f"{path}/{SNAPSHOT_FILE}"
+        self.journal_path = journal_path or f"{path}/{JOURNAL_FILE}"
+        self.compact_every = compact_every or COMPACT_EVERY
+
+        self._lock = threading.RLock()
+        self._cases = []
+        self._index = {}  # case_no -> position in self._cases
+        self._snapshot_stamp = None
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    # --------- Reading ---------------
+    def cases(self):
+        """Return copies of every case dict."""
+        with self._lock:
+            self._refresh()
+            return [copy_case(case) for case in self._cases]
+
+    def _iter_cases(self):
+        with self._lock:
+            self._refresh()
+            return list(self._cases)
+
+    def get(self, case_no):
+        """Return a copy of a single case dict by case number, or None."""
+        with self._lock:
+            self._refresh()
+            pos = self._index.get(case_no)
+            return None if pos is None else copy_case(self._cases[pos])
+
+    def priority_index(self):
+        with self._lock:
+            self._refresh()
+            return super().priority_index()
+
+    def _stamp(self, file_path):
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        """Pick up changes made by other writers since the last read."""
+        stamp = self._stamp(self.snapshot_path)
+        journal = self._stamp(self.journal_path)
+        journal_size = journal[1] if journal else 0
+
+        if stamp != self._snapshot_stamp or journal_size < self._journal_offset:
+            self._load_snapshot()
+            self._snapshot_stamp = stamp
+            self._journal_offset = 0
+            self._journal_records = 0
+
+        if journal_size > self._journal_offset:
+            self._replay_journal()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                self._cases = json.load(f)
+        except FileNotFoundError:
+            self._cases = []
+        self._index = {case["case_no"]: i for i, case in enumerate(self._cases)}
+        # Another writer may have changed anything; recompute on next use
+        self._max_thread_len = None
+        self._priority_index = None
+        # Restored by the journal's scoring_state record, if there is one
+        self._scoring_state = (None, None)
+        self._dirty.update(
+            case["case_no"] for case in self._cases if needs_scoring(case)
+        )
+
+    def _replay_journal(self):
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for raw in f:
+                # A torn last line means the writer crashed mid-record; stop there.
+                if not raw.endswith(b"\n"):
+                    break
+                self._journal_offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                self._apply(json.loads(line))
+                self._journal_records += 1
+
+    # --------- Applying records ---------------
+    def _apply(self, record):
+        op = record["op"]
+        if op == "add_case":
+            case = record["case"]
+            if case["case_no"] not in self._index:
+                self._index[case["case_no"]] = len(self._cases)
+                self._cases.append(case)
+                self._touch(case["case_no"], len(case["thread"]))
+                self._reindex(case)
+        elif op == "append_thread":
+            case = self._get_loaded(record["case_no"])
+            if case is not None and self._is_new_entry(case, record):
+                case["thread"].append(record["entry"])
+                self._touch(case["case_no"], len(case["thread"]))
+        elif op == "scoring_state":
+            self._scoring_state = (record["max_thread_len"], record["model_key"])
+        elif op == "update":
+            for case_no, fields in record["updates"].items():
+                case = self._get_loaded(case_no)
+                if case is not None:
+                    case.update(fields)
+                    if "thread" in fields or "case_detail" in fields:
+                        self._touch(case_no, len(case["thread"]))
+                    if "score_threads" in fields and not needs_scoring(case):
+                        # Scored after the change that made it dirty
+                        self._dirty.discard(case_no)
+                    self._reindex(case)
+        else:
+            raise ValueError(f"Unknown journal op: {op}")
+
+    @staticmethod
+    def _is_new_entry(case, record):
+        entry_id = record["entry"].get("entry_id")
+        if entry_id is None:
+            # Journals written before entry ids: apply only if the thread is
+            # still the length it had when journaled
+            return len(case["thread"]) == record.get("index")
+        return all(entry.get("entry_id") != entry_id for entry in case["thread"])
+
+    def _get_loaded(self, case_no):
+        pos = self._index.get(case_no)
+        return None if pos is None else self._cases[pos]
+
+    # --------- Writing ---------------
+    def add_case(self, case):
+        """Add a new case to the archive."""
+        self.write([{"op": "add_case", "case": case}])
+
+    def _thread_record(self, case_no, entry):
+        if self._get_loaded(case_no) is None:
+            raise KeyError(f"Unknown case: {case_no}")
+        return {
+            "op": "append_thread",
+            "case_no": case_no,
+            "entry": dict(entry, entry_id=uuid.uuid4().hex),
+        }
+
+    def append_thread(self, case_no, entry):
+        """Append a grievance entry to an existing case's thread."""
+        with self._lock:
+            self._refresh()
+            self.write([self._thread_record(case_no, entry)])
+
+    def add_batch(self, new_cases, thread_entries):
+        """Journal a whole ingestion batch with a single append."""
+        with self._lock:
+            self._refresh()
+            records = [{"op": "add_case", "case": case} for case in new_cases]
+            records.extend(
+                self._thread_record(case_no, entry) for case_no, entry in thread_entries
+            )
+            self.write(records)
+
+    def update_many(self, updates):
+        """Overwrite fields on several cases at once: {case_no: {field: value}}."""
+        if updates:
+            self.write([{"op": "update", "updates": updates}])
+
+    def dirty_case_nos(self):
+        with self._lock:
+            self._refresh()
+            return super().dirty_case_nos()
+
+    def scoring_state(self):
+        with self._lock:
+            self._refresh()
+            return self._scoring_state
+
+    def save_scoring_state(self, max_thread_len, model_key):
+        record = self._scoring_record(max_thread_len, model_key)
+        with self._lock:
+            self._refresh()
+            if self._scoring_state != (max_thread_len, model_key):
+                self.write([record])
+
+    @staticmethod
+    def _scoring_record(max_thread_len, model_key):
+        return {"op": "scoring_state", "max_thread_len": max_thread_len, "model_key": model_key}
+
+    def import_json(self, file_path):
+        """Load every case from a JSON list file as a single journal append."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._refresh()
+            records = [
+                {"op": "update", "updates": {case["case_no"]: case}}
+                if case["case_no"] in self._index
+                else {"op": "add_case", "case": case}
+                for case in data
+            ]
+            self.write(records)
+        return len(data)
+
+    @property
+    def _lock_path(self):
+        return f"{self.journal_path}.lock"
+
+    def write(self, records):
+        """Journal a batch of records with a single append, then apply them."""
+        if not records:
+            return
+        with self._lock, file_lock(self._lock_path):
+            self._refresh()
+            payload = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            # Replay from our offset so records appended by other writers in
+            # the meantime are applied in journal order along with ours.
+            self._replay_journal()
+
+            if self._journal_records >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and truncate the journal."""
+        with self._lock, file_lock(self._lock_path):
+            self._compact()
+
+    def _compact(self):
+        # Caller holds the journal lock, so no record lands between the
+        # snapshot and the truncation
+        self._refresh()
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cases, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Truncating after the snapshot is durable is safe: replaying the
+        # old journal on top of the new snapshot would be a no-op. The
+        # scoring state starts the new journal (lost only by a crash here,
+        # which costs one full scoring pass).
+        scoring_state = self._scoring_state
+        open(self.journal_path, "wb").close()
+        self._snapshot_stamp = self._stamp(self.snapshot_path)
+        self._journal_offset = 0
+        self._journal_records = 0
+        if scoring_state != (None, None):
+            with open(self.journal_path, "ab") as f:
+                f.write((json.dumps(self._scoring_record(*scoring_state)) + "\n").encode("utf-8"))
+            self._replay_journal()
+
+
+CASE_COLUMNS = (
+    "case_no",
+    "case_category",
+    "case_detail",
+    "problem_start",
+    "location",
+    "priority",
+    "score",
+    "status",
+)
+THREAD_COLUMNS = ("caller_name", "caller_phone_no", "description", "location", "date_time")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_no TEXT PRIMARY KEY,
+    case_category TEXT,
+    category_name TEXT,
+    case_detail TEXT,
+    problem_start TEXT,
+    problem_start_ts REAL,
+    location TEXT,
+    location_key TEXT,
+    priority TEXT,
+    score REAL,
+    status TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS thread (
+    case_no TEXT NOT NULL REFERENCES cases(case_no),
+    seq INTEGER NOT NULL,
+    caller_name TEXT,
+    caller_phone_no TEXT,
+    description TEXT,
+    location TEXT,
+    date_time TEXT,
+    PRIMARY KEY (case_no, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_cases_location_start ON cases(location_key, problem_start_ts);
+CREATE INDEX IF NOT EXISTS idx_cases_problem_start ON cases(problem_start_ts);
+CREATE INDEX IF NOT EXISTS idx_cases_status_score ON cases(status, score DESC);
+CREATE INDEX IF NOT EXISTS idx_cases_category_score ON cases(category_name, score DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def chunked(values, size=SQLITE_MAX_VARIABLES):
+    """Consecutive slices of a tuple, each small enough to bind in one query."""
+    return [values[i : i + size] for i in range(0, len(values), size)]
+
+
+class SqliteCaseStore(CaseStore):
+    """
+    Case archive in a SQLite database (WAL mode).
+
+    Filtered fields are real indexed columns: location + problem_start for
+    thread candidate lookup, status/category + score for department listing
+    and priority ordering, and case_no as the primary key. Any extra keys on a
+    case dict round-trip through a JSON "extra" column.
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__()
+        path = os.getcwd()
+        self.db_path = db_path or f"{path}/{SQLITE_FILE}"
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._load_scoring_state()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SQLITE_SCHEMA_VERSION:
+            return
+        # location_key is now the canonical district; recompute it for old rows
+        with self._conn:
+            rows = self._conn.execute("SELECT case_no, location FROM cases").fetchall()
+            self._conn.executemany(
+                "UPDATE cases SET location_key = ? WHERE case_no = ?",
+                [(location_key(row["location"]), row["case_no"]) for row in rows],
+            )
+            self._conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+
+    def _load_scoring_state(self):
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'scoring_state'"
+        ).fetchone()
+        if row is not None:
+            self._scoring_state = tuple(json.loads(row["value"]))
+        # Cases whose score counted fewer thread entries than they have now
+        rows = self._conn.execute(
+            "SELECT case_no FROM cases LEFT JOIN "
+            "(SELECT case_no, COUNT(*) AS n FROM thread GROUP BY case_no) USING (case_no) "
+            "WHERE json_extract(extra, '$.score_threads') IS NOT COALESCE(n, 0)"
+        ).fetchall()
+        self._dirty.update(row["case_no"] for row in rows)
+
+    def save_scoring_state(self, max_thread_len, model_key):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('scoring_state', ?)",
+                (json.dumps([max_thread_len, model_key]),),
+            )
+            self._scoring_state = (max_thread_len, model_key)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --------- Row mapping ---------------
+    def _case_row(self, case):
+        start = parse_timestamp(case.get("problem_start"))
+        extra = {
+            k: v for k, v in case.items() if k not in CASE_COLUMNS and k != "thread"
+        }
+        return (
+            case["case_no"],
+            json.dumps(case.get("case_category", "")),
+            category_name(case.get("case_category")),
+            case.get("case_detail", ""),
+            case.get("problem_start", ""),
+            start.timestamp() if start else None,
+            case.get("location", ""),
+            location_key(case.get("location")),
+            case.get("priority", ""),
+            case.get("score", 0),
+            case.get("status", "open"),
+            json.dumps(extra) if extra else None,
+        )
+
+    def _insert_case(self, case, with_thread=True):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._case_row(case),
+        )
+        self._reindex(case)
+        if not with_thread:
+            return
+        self._touch(case["case_no"], len(case.get("thread", [])))
+        self._conn.execute("DELETE FROM thread WHERE case_no = ?", (case["case_no"],))
+        self._conn.executemany(
+            "INSERT INTO thread VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (case["case_no"], seq) + tuple(entry.get(c) for c in THREAD_COLUMNS)
+                for seq, entry in enumerate(case.get("thread", []))
+            ],
+        )
+
+    def _load_cases(self, where="", params=(), order=""):
+        rows = self._conn.execute(
+            f"SELECT * FROM cases {where} {order}", params
+        ).fetchall()
+        if not rows:
+            return []
+        threads = {row["case_no"]: [] for row in rows}
+        for chunk in chunked(tuple(threads)):
+            for entry in self._conn.execute(
+                f"SELECT * FROM thread WHERE case_no IN ({','.join('?' * len(chunk))}) "
+                "ORDER BY case_no, seq",
+                chunk,
+            ):
+                threads[entry["case_no"]].append({c: entry[c] for c in THREAD_COLUMNS})
+
+        cases = []
+        for row in rows:
+            case = {c: row[c] for c in CASE_COLUMNS}
+            case["case_category"] = json.loads(row["case_category"] or '""')
+            case["thread"] = threads[row["case_no"]]
+            if row["extra"]:
+                case.update(json.loads(row["extra"]))
+            cases.append(case)
+        return cases
+
+    # --------- Reading ---------------
+    def cases(self):
+        with self._lock:
+            return self._load_cases()
+
+    def get(self, case_no):
+        with self._lock:
+            found = self._load_cases("WHERE case_no = ?", (case_no,))
+            return found[0] if found else None
+
+    def get_many(self, case_nos):
+        case_nos = tuple(case_nos)
+        if not case_nos:
+            return []
+        found = []
+        with self._lock:
+            for chunk in chunked(case_nos):
+                found.extend(
+                    self._load_cases(f"WHERE case_no IN ({','.join('?' * len(chunk))})", chunk)
+                )
+        # Same order as requested, like the base implementation
+        by_no = {case["case_no"]: case for case in found}
+        return [by_no[case_no] for case_no in case_nos if case_no in by_no]
+
+    def max_thread_len(self):
+        if self._max_thread_len is None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT MAX(n) FROM (SELECT COUNT(*) AS n FROM thread GROUP BY case_no)"
+                ).fetchone()
+                self._max_thread_len = row[0] or 0
+        return self._max_thread_len
+
+    def candidates(self, location, start, end):
+        with self._lock:
+            return self._load_cases(
+                "WHERE location_key = ? AND problem_start_ts BETWEEN ? AND ?",
+                (location_key(location), start.timestamp(), end.timestamp()),
+            )
+
+    def by_department(self, department):
+        with self._lock:
+            return self._load_cases("WHERE category_name = ?", (department,))
+
+    def by_priority(self, limit=None, department=None, status="open"):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if department is not None:
+            clauses.append("category_name = ?")
+            params.append(department)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "ORDER BY score DESC"
+        if limit is not None:
+            order += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._load_cases(where, tuple(params), order)
+
+    # --------- Writing ---------------
+    def add_case(self, case):
+        with self._lock, self._conn:
+            self._insert_case(case)
+
+    def _append_thread(self, case_no, entry):
+        if self._conn.execute(
+            "SELECT 1 FROM cases WHERE case_no = ?", (case_no,)
+        ).fetchone() is None:
+            raise KeyError(f"Unknown case: {case_no}")
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM thread WHERE case_no = ?", (case_no,)
+        ).fetchone()
+        self._conn.execute(
+            "INSERT INTO thread VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (case_no, row[0]) + tuple(entry.get(c) for c in THREAD_COLUMNS),
+        )
+        self._touch(case_no, row[0] + 1)
+
+    def append_thread(self, case_no, entry):
+        with self._lock, self._conn:
+            self._append_thread(case_no, entry)
+
+    def add_batch(self, new_cases, thread_entries):
+        """Write a whole ingestion batch in one transaction."""
+        with self._lock, self._conn:
+            for case in new_cases:
+                self._insert_case(case)
+            for case_no, entry in thread_entries:
+                self._append_thread(case_no, entry)
+
+    def update_many(self, updates):
+        if not updates:
+            return
+        with self._lock, self._conn:
+            for case_no, fields in updates.items():
+                found = self._load_cases("WHERE case_no = ?", (case_no,))
+                if not found:
+                    continue
+                case = found[0]
+                case.update(fields)
+                self._insert_case(case, with_thread="thread" in fields)
+
+    def import_json(self, file_path):
+        """Load every case from a JSON list file in one transaction."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock, self._conn:
+            for case in data:
+                self._insert_case(case)
+        return len(data)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_case_store(backend=None):
+    """
+    Process-wide store for the archive under the current working directory.
+
+    The backend defaults to MOSAIC_CASE_STORE ("json" or "sqlite").
+    """
+    backend = backend or CASE_STORE_BACKEND
+    key = (os.getcwd(), backend)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "sqlite":
+                store = SqliteCaseStore()
+            elif backend == "json":
+                store = JournaledCaseStore()
+            else:
+                raise ValueError(f"Unknown case store backend: {backend}")
+            _stores[key] = store
+        return store
@@ -0,0 +1,86 @@
+import json
+import os
+import re
+import threading
+
+# ------------- CONFIGURATION ----------------
+CATEGORIES_FILE = "data/categories_data.json"
+
+
+def category_id(name):
+    """Compact, stable id for a category name, e.g. "Energy, Power & Electricity" -> "energy-power-electricity"."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+class CategoryRegistry:
+    """
+    Single in-memory copy of the department categories.
+
+    Cases store only a category id; everything else (name, semantic weight,
+    keywords) is resolved here. Legacy cases that still embed the full
+    category dict, or just its name, resolve to the same entry.
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self._by_id = {}
+        self._by_name = {}
+        for category in self.categories:
+            self._by_id[category_id(category["name"])] = category
+            self._by_name[category["name"]] = category
+        self.total_weight = sum(c["semantic_weight"] for c in self.categories)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def ids(self):
+        return list(self._by_id)
+
+    def names(self):
+        return [c["name"] for c in self.categories]
+
+    def resolve(self, value):
+        """Return the category dict for an id, a name or a legacy embedded dict."""
+        if not value:
+            return None
+        if isinstance(value, dict):
+            value = value.get("name", "")
+            return self._by_name.get(value) or self._by_id.get(category_id(value))
+        return self._by_id.get(value) or self._by_name.get(value)
+
+    def id_of(self, value):
+        """Compact id for any accepted category value, or "" if unknown."""
+        category = self.resolve(value)
+        return category_id(category["name"]) if category else ""
+
+    def name(self, value):
+        """Display name for any accepted category value, or "" if unknown."""
+        category = self.resolve(value)
+        if category:
+            return category["name"]
+        if isinstance(value, dict):
+            return value.get("name", "")
+        return value or ""
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_category_registry(file_path=None):
+    """Shared registry for the categories file, reloaded when the file changes."""
+    file_path = file_path or f"{os.getcwd()}/{CATEGORIES_FILE}"
+    mtime = os.stat(file_path).st_mtime_ns
+    with _registries_lock:
+        cached = _registries.get(file_path)
+        if cached is None or cached[0] != mtime:
+            cached = _registries[file_path] = (mtime, CategoryRegistry.load(file_path))
+        return cached[1]
@@ -0,0 +1,273 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from components.categories import CategoryRegistry
+
+# ------------- CONFIGURATION ----------------
+CATEGORY_MODEL_DIR = "data/models"
+# "tfidf" (keyword TF-IDF) or "embedding" (sentence-embedding centroids)
+CATEGORY_CLASSIFIER = os.getenv("MOSAIC_CATEGORY_CLASSIFIER", "tfidf")
+
+
+def keyword_category_matrix(categories):
+    """
+    Sparse (keywords x categories) matrix with 1/len(keywords) in each
+    keyword's category column, so multiplying per-keyword similarities by it
+    gives the mean similarity per category.
+    """
+    rows, cols, values = [], [], []
+    keyword_idx = 0
+    for category_idx, category in enumerate(categories):
+        keyword_count = len(category["keywords"])
+        for _ in range(keyword_count):
+            rows.append(keyword_idx)
+            cols.append(category_idx)
+            values.append(1.0 / keyword_count)
+            keyword_idx += 1
+    return sp.csr_matrix((values, (rows, cols)), shape=(keyword_idx, len(categories)))
+
+
+def file_hash(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class CategoryModel:
+    """
+    TF-IDF department classifier fitted once from the category keywords.
+
+    The vocabulary and IDF come from the keywords only, so the category space
+    does not shift as cases are added. Keyword vectors are L2-normalized, so
+    the mean cosine similarity to each category's keywords folds into one
+    precomputed (features x categories) matrix, and scoring texts is a single
+    transform plus one sparse product.
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.vectorizer = TfidfVectorizer(
+            stop_words="english",
+            lowercase=True,
+            ngram_range=(1, 2),  # Include both unigrams and bigrams
+            max_features=10000,
+        )
+        keywords = [k for category in self.categories for k in category["keywords"]]
+        keyword_vectors = self.vectorizer.fit_transform(keywords)
+        self.category_matrix = sp.csr_matrix(
+            keyword_vectors.T @ keyword_category_matrix(self.categories)
+        )
+
+    def scores(self, texts):
+        """Dense (texts x categories) mean keyword similarity."""
+        return np.asarray((self.vectorizer.transform(texts) @ self.category_matrix).todense())
+
+    def classify(self, texts):
+        """Best category index and its score for each text (first wins on ties)."""
+        scores = self.scores(texts)
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(best)), best]
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, file_path)
+
+    @staticmethod
+    def load(file_path):
+        with open(file_path, "rb") as f:
+            return pickle.load(f)
+
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingCategoryModel:
+    """
+    Sentence-embedding department classifier.
+
+    Each department is one L2-normalized centroid of its keyword embeddings,
+    so classifying a batch of case texts is one (texts x dim) @ (dim x
+    categories) product. Unlike the TF-IDF model it still matches texts that
+    share no tokens with any keyword ("insects infesting my house" vs "pest
+    control"). Case texts are embedded through the shared embedding cache, so
+    descriptions already grouped by subredditting() are not re-encoded.
+    """
+
+    def __init__(self, categories, centroids):
+        self.categories = list(categories)
+        self.centroids = normalize_rows(centroids)
+
+    @classmethod
+    def fit(cls, categories, encode):
+        """Build centroids from the keywords with encode(list_of_texts)."""
+        categories = list(categories)
+        keywords = [k for category in categories for k in category["keywords"]]
+        keyword_vectors = normalize_rows(encode(keywords))
+        # Mean keyword embedding per category; categories without keywords stay zero
+        centroids = keyword_category_matrix(categories).T @ keyword_vectors
+        return cls(categories, centroids)
+
+    def embed(self, texts):
+        from subreddit.simitestllm import encode, get_embedding_cache
+
+        if not texts:
+            return np.zeros((0, self.centroids.shape[1]), dtype=np.float32)
+        return np.vstack(get_embedding_cache().get_or_compute_many(list(texts), encode))
+
+    def scores(self, texts):
+        """Dense (texts x categories) cosine similarity to each centroid."""
+        return normalize_rows(self.embed(texts)) @ self.centroids.T
+
+    def classify(self, texts):
+        """Best category index and its score for each text (first wins on ties)."""
+        scores = self.scores(texts)
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(best)), best]
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        tmp_path = f"{file_path}.tmp.npy"
+        np.save(tmp_path, self.centroids)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, categories, file_path):
+        return cls(categories, np.load(file_path))
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_category_model(categories_path=None):
+    """
+    Category model for the categories file, keyed by a hash of its contents.
+
+    Loaded from data/models/ when a model for this exact file exists, otherwise
+    fitted and saved there; it is only refitted when the file changes.
+    """
+    path = os.getcwd()
+    categories_path = categories_path or f"{path}/data/categories_data.json"
+    digest = file_hash(categories_path)
+    with _models_lock:
+        model = _models.get(digest)
+        if model is None:
+            model_path = f"{path}/{CATEGORY_MODEL_DIR}/category_model-{digest}.pkl"
+            try:
+                model = CategoryModel.load(model_path)
+            except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+                model = CategoryModel(CategoryRegistry.load(categories_path))
+                model.save(model_path)
+            _models[digest] = model
+        return model
+
+
+def get_embedding_category_model(categories_path=None):
+    """
+    Embedding classifier for the categories file.
+
+    Centroids are cached in data/models/ under the categories file hash and
+    the embedding model name, so the keywords are only encoded again when
+    either changes.
+    """
+    from subreddit.simitestllm import EMBEDDING_MODEL, encode
+
+    path = os.getcwd()
+    categories_path = categories_path or f"{path}/data/categories_data.json"
+    digest = file_hash(categories_path)
+    key = ("embedding", EMBEDDING_MODEL, digest)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            categories = CategoryRegistry.load(categories_path)
+            model_path = (
+                f"{path}/{CATEGORY_MODEL_DIR}/category_centroids-{EMBEDDING_MODEL}-{digest}.npy"
+            )
+            try:
+                model = EmbeddingCategoryModel.load(categories, model_path)
+            except (FileNotFoundError, ValueError, EOFError):
+                model = EmbeddingCategoryModel.fit(categories, encode)
+                model.save(model_path)
+            _models[key] = model
+        return model
+
+
+def get_classifier(categories_path=None, mode=None):
+    """Department classifier selected by MOSAIC_CATEGORY_CLASSIFIER."""
+    mode = mode or CATEGORY_CLASSIFIER
+    if mode == "embedding":
+        return get_embedding_category_model(categories_path)
+    if mode == "tfidf":
+        return get_category_model(categories_path)
+    raise ValueError(f"Unknown category classifier: {mode}")
+
+
+def classifier_key(categories_path=None, mode=None):
+    """
+    Identifies the classifier get_classifier() would use: its mode, the
+    embedding model for "embedding", and the categories file hash. Scores
+    computed under a different key are stale.
+    """
+    mode = mode or CATEGORY_CLASSIFIER
+    categories_path = categories_path or f"{os.getcwd()}/data/categories_data.json"
+    digest = file_hash(categories_path)
+    if mode == "embedding":
+        from subreddit.simitestllm import EMBEDDING_MODEL
+
+        return f"embedding-{EMBEDDING_MODEL}-{digest}"
+    if mode == "tfidf":
+        return f"tfidf-{digest}"
+    raise ValueError(f"Unknown category classifier: {mode}")
+
+
+def compare_classifiers(texts, categories_path=None):
+    """
+    A/B metrics of the embedding classifier against the TF-IDF one on texts.
+
+    Returns the agreement rate, per-category counts for each classifier, the
+    mean best score and mean top-2 margin of each, how many texts TF-IDF
+    scored 0 against every category (its choice there is arbitrary), and the
+    texts the two disagree on.
+    """
+    texts = list(texts)
+    results = {}
+    choices = {}
+    all_scores = {}
+    for mode in ("tfidf", "embedding"):
+        model = get_classifier(categories_path, mode)
+        scores = all_scores[mode] = model.scores(texts)
+        best = np.argmax(scores, axis=1)
+        top2 = np.sort(scores, axis=1)[:, -2:] if scores.shape[1] > 1 else scores
+        names = [model.categories[i]["name"] for i in best]
+        choices[mode] = names
+        results[mode] = {
+            "counts": {
+                category["name"]: names.count(category["name"])
+                for category in model.categories
+            },
+            "mean_score": float(scores.max(axis=1).mean()) if texts else 0.0,
+            "mean_margin": float((top2[:, -1] - top2[:, 0]).mean()) if texts else 0.0,
+        }
+    results["tfidf"]["no_match"] = (
+        int((all_scores["tfidf"].max(axis=1) == 0).sum()) if texts else 0
+    )
+    disagreements = [
+        {"text": text, "tfidf": a, "embedding": b}
+        for text, a, b in zip(texts, choices["tfidf"], choices["embedding"])
+        if a != b
+    ]
+    results["agreement"] = (1 - len(disagreements) / len(texts)) if texts else 1.0
+    results["disagreements"] = disagreements
+    return results
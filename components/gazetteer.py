@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# ------------- CONFIGURATION ----------------
+GAZETTEER_FILE = "data/up_gazetteer.json"
+
+NOT_UP = -1  # PIN table value for PINs outside Uttar Pradesh
+PIN_TABLE_DIGITS = 5  # PINs are resolved by their first five digits
+
+_TOKEN = re.compile(r"[a-z]+")
+_PIN = re.compile(r"\b(\d{6})\b")
+
+
+def tokens(text):
+    return _TOKEN.findall(text.lower())
+
+
+class Gazetteer:
+    """
+    Uttar Pradesh districts, their localities and aliases, and PIN codes.
+
+    PIN codes resolve through a flat array indexed by the first five digits,
+    filled from prefix rules in the data file (shorter prefixes first, so a
+    longer one overrides: all of 246 is Uttarakhand except 2467, Bijnor).
+    Each entry is a district index, UNKNOWN for UP PINs without a known
+    district, or NOT_UP. Place names are token sequences in a trie, matched
+    longest-first in one pass over the text's tokens.
+    """
+
+    def __init__(self, data):
+        self.districts = [d["name"] for d in data["districts"]]
+        self.unknown = len(self.districts)  # UP PIN, district not recorded
+        district_idx = {name: i for i, name in enumerate(self.districts)}
+
+        self.pin_table = np.full(10**PIN_TABLE_DIGITS, NOT_UP, dtype=np.int16)
+        for prefix, district in sorted(data["pin_rules"], key=lambda r: len(r[0])):
+            if district is None:
+                value = NOT_UP
+            elif district == "":
+                value = self.unknown
+            else:
+                value = district_idx[district]
+            scale = 10 ** (PIN_TABLE_DIGITS - len(prefix))
+            start = int(prefix) * scale
+            self.pin_table[start : start + scale] = value
+
+        # Token trie: nested dicts, a district index under the None key ends a name
+        self.trie = {}
+        self.names = {}  # lowercase name or alias -> district index
+        for entry in data["districts"]:
+            idx = district_idx[entry["name"]]
+            for name in [entry["name"]] + entry.get("aliases", []):
+                words = tokens(name)
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                node[None] = idx
+                self.names[" ".join(words)] = idx
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # --------- PIN codes ---------------
+    def pin_status(self, pin) -> int:
+        """District index, self.unknown (UP, no district) or NOT_UP for a 6-digit PIN."""
+        return int(self.pin_table[int(pin) // 10 ** (6 - PIN_TABLE_DIGITS)])
+
+    def is_up_pin(self, pin) -> bool:
+        return self.pin_status(pin) != NOT_UP
+
+    def pin_district(self, pin) -> Optional[str]:
+        status = self.pin_status(pin)
+        return self.districts[status] if 0 <= status < self.unknown else None
+
+    # --------- Place names ---------------
+    def find(self, text) -> List[Tuple[int, int, str]]:
+        """
+        (start token, end token, district) for each place named in text,
+        left to right, taking the longest name at each position.
+        """
+        words = tokens(text)
+        found = []
+        i = 0
+        while i < len(words):
+            node = self.trie
+            match = None
+            j = i
+            while j < len(words) and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if None in node:
+                    match = (i, j, self.districts[node[None]])
+            if match:
+                found.append(match)
+                i = match[1]
+            else:
+                i += 1
+        return found
+
+    def first_place(self, text) -> Optional[Tuple[str, str]]:
+        """(name as written, district) of the first place named in text, or None."""
+        words = tokens(text)
+        found = self.find(text)
+        if not found:
+            return None
+        start, end, district = found[0]
+        return " ".join(words[start:end]), district
+
+    def district(self, location) -> Optional[str]:
+        """Canonical district for a location string: a named place first, else its PIN."""
+        if not location:
+            return None
+        found = self.find(location)
+        if found:
+            return found[0][2]
+        pin_match = _PIN.search(location)
+        if pin_match:
+            return self.pin_district(pin_match.group(1))
+        return None
+
+    def is_up(self, location) -> bool:
+        """
+        Whether a location string is in Uttar Pradesh: decided by its PIN
+        when it has one, otherwise by naming a UP district or locality.
+        """
+        if not location:
+            return False
+        pin_match = _PIN.search(location)
+        if pin_match:
+            return self.is_up_pin(pin_match.group(1))
+        return bool(self.find(location))
+
+
+_gazetteers = {}
+_gazetteers_lock = threading.Lock()
+
+
+def get_gazetteer(file_path=None):
+    """Gazetteer for data/up_gazetteer.json, loaded once per file."""
+    file_path = file_path or f"{os.getcwd()}/{GAZETTEER_FILE}"
+    with _gazetteers_lock:
+        gazetteer = _gazetteers.get(file_path)
+        if gazetteer is None:
+            gazetteer = Gazetteer.load(file_path)
+            _gazetteers[file_path] = gazetteer
+        return gazetteer
@@ -1,9 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 from datetime import datetime
 import os
 
+from components.case_store import get_case_store, category_name
+from components.categories import get_category_registry
+
 path = os.getcwd()
 
 
@@ -23,24 +25,34 @@ class GrievanceManagementGUI:
         self.populate_table()
 
     def load_case_data(self):
-        """Load case records from case_data.json file, filtering for non-empty priority"""
-        with open(f"{path}/data/test.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        """Load case records from the case store, filtering for non-empty priority"""
+        data = get_case_store().cases()
 
         # Filter cases with non-empty priority
-        filtered_cases = []
-        for case in data:
-            priority = case.get("priority", "")
-            if priority and str(priority).strip():
-                filtered_cases.append(case)
+        return [case for case in data if self.has_priority(case)]
 
-        return filtered_cases
+    @staticmethod
+    def grievance_time(grievance):
+        """A thread entry's date_time as a datetime for sorting (datetime.min if unparseable)."""
+        date_str = grievance.get("date_time", "")
+        try:
+            # Try parsing different formats
+            if "T" in date_str:
+                return datetime.fromisoformat(date_str.replace("T", " ").replace("Z", ""))
+            return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+        except:
+            return datetime.min
+
+    @staticmethod
+    def has_priority(case):
+        """Whether a case has been scored (non-empty priority)."""
+        priority = case.get("priority", "")
+        return bool(priority and str(priority).strip())
 
     def load_categories_data(self):
         """Load full categories data for keyword matching"""
         try:
-            with open(f"{path}/data/categories_data.json", "r") as f:
-                return json.load(f)
+            return get_category_registry(f"{path}/data/categories_data.json")
         except Exception as e:
             print(f"Error loading categories data: {e}")
             return []
@@ -48,19 +60,8 @@ class GrievanceManagementGUI:
     def load_departments(self):
         """Load departments from categories_data.json if available, otherwise use defaults"""
         try:
-            with open(f"{path}/data/categories_data.json", "r") as f:
-                data = json.load(f)
-
-                # Since JSON is an array of category objects, extract names
-                if isinstance(data, list):
-                    dept_names = []
-                    for item in data:
-                        if isinstance(item, dict) and "name" in item:
-                            dept_names.append(item["name"])
-                    return ["All Departments"] + dept_names
-                else:
-                    # Fallback for other formats
-                    return ["All Departments"] + list(data.keys())
+            registry = get_category_registry(f"{path}/data/categories_data.json")
+            return ["All Departments"] + registry.names()
 
         except Exception as e:
             print(f"Error loading departments: {e}")
@@ -184,11 +185,15 @@ class GrievanceManagementGUI:
 
         self.update_status()
 
+    def case_category_name(self, case):
+        """Resolve a case's category id (or legacy embedded dict) to its name"""
+        return category_name(case.get("case_category", ""))
+
     def debug_categories(self):
         """Debug function to show unique categories in the data"""
         unique_categories = set()
         for case in self.case_records:
-            category = case.get("case_category", "")
+            category = self.case_category_name(case)
             if category:
                 unique_categories.add(category)
 
@@ -205,7 +210,7 @@ class GrievanceManagementGUI:
     def categorize_case_by_keywords(self, case):
         """Categorize a case based on keywords matching"""
         case_text = (
-            f"{case.get('case_category', '')} {case.get('case_detail', '')}"
+            f"{self.case_category_name(case)} {case.get('case_detail', '')}"
         ).lower()
 
         best_match = None
@@ -248,25 +253,8 @@ class GrievanceManagementGUI:
 
             thread = case.get("thread", [])
             if thread:
-                # Parse datetime for sorting
-                for grievance in thread:
-                    date_str = grievance.get("date_time", "")
-                    try:
-                        # Try parsing different formats
-                        if "T" in date_str:
-                            parsed_date = datetime.fromisoformat(
-                                date_str.replace("T", " ").replace("Z", "")
-                            )
-                        else:
-                            parsed_date = datetime.strptime(
-                                date_str, "%Y-%m-%d %H:%M:%S"
-                            )
-                        grievance["parsed_date"] = parsed_date
-                    except:
-                        grievance["parsed_date"] = datetime.min
-
                 # Get latest grievance
-                latest = max(thread, key=lambda g: g.get("parsed_date", datetime.min))
+                latest = max(thread, key=self.grievance_time)
                 caller_name = latest.get("caller_name", "")
                 caller_phone = latest.get("caller_phone_no", "")
                 description = latest.get("description", "")
@@ -285,7 +273,7 @@ class GrievanceManagementGUI:
                 "end",
                 values=(
                     case.get("case_no", ""),
-                    case.get("case_category", ""),
+                    self.case_category_name(case),
                     formatted_detail,
                     case.get("problem_start", ""),
                     case.get("location", ""),
@@ -300,12 +288,27 @@ class GrievanceManagementGUI:
 
     def filter_cases_by_department(self):
         """Filter cases based on selected department"""
-        if self.current_department == "All Departments":
-            return self.case_records
+        # Open cases come first, highest score first, from the store's
+        # priority index; the rest follow in archive order.
+        department = None
+        if self.current_department != "All Departments":
+            department = self.current_department
+        filtered_cases = [
+            case
+            for case in get_case_store().iter_priority(department)
+            if self.has_priority(case)
+        ]
+        ranked = {case["case_no"] for case in filtered_cases}
+
+        if department is None:
+            return filtered_cases + [
+                case for case in self.case_records if case["case_no"] not in ranked
+            ]
 
-        filtered_cases = []
         for case in self.case_records:
-            case_category = case.get("case_category", "")
+            if case["case_no"] in ranked:
+                continue
+            case_category = self.case_category_name(case)
 
             # Method 1: Direct string matching
             if case_category == self.current_department:
@@ -321,8 +324,11 @@ class GrievanceManagementGUI:
 
             # Method 3: Partial string matching (case insensitive)
             if (
-                self.current_department.lower() in case_category["name"].lower()
-                or case_category["name"].lower() in self.current_department.lower()
+                case_category
+                and (
+                    self.current_department.lower() in case_category.lower()
+                    or case_category.lower() in self.current_department.lower()
+                )
             ):
                 filtered_cases.append(case)
 
@@ -335,10 +341,9 @@ class GrievanceManagementGUI:
             item = self.tree.item(selection[0])
             case_no = item["values"][0]
 
-            # Find the case record
-            case = next(
-                (c for c in self.case_records if c.get("case_no") == case_no), None
-            )
+            # Rows may come from the priority index rather than
+            # self.case_records, so look the case up in the store
+            case = get_case_store().get(str(case_no))
             if case:
                 self.show_case_details(case)
 
@@ -358,7 +363,7 @@ class GrievanceManagementGUI:
 
         info_labels = [
             ("Case No:", case.get("case_no", "")),
-            ("Category:", case.get("case_category", "")),
+            ("Category:", self.case_category_name(case)),
             ("Detail:", case.get("case_detail", "")),
             ("Problem Start:", case.get("problem_start", "")),
             ("Location:", case.get("location", "")),
@@ -392,9 +397,7 @@ class GrievanceManagementGUI:
                 grv_tree.column(col, width=100)
 
             # Sort grievances by date (newest first)
-            sorted_thread = sorted(
-                thread, key=lambda g: g.get("parsed_date", datetime.min), reverse=True
-            )
+            sorted_thread = sorted(thread, key=self.grievance_time, reverse=True)
 
             for grievance in sorted_thread:
                 date_str = grievance.get("date_time", "")
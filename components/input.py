@@ -1,34 +1,40 @@
-import speech_recognition as sr
 from datetime import datetime
+import hashlib
 import json
-import google.generativeai as genai
-import pyttsx3
 import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
 
 from .models import Grievance
 from dotenv import load_dotenv
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Audio I/O is only needed by the live agents; extraction works without it
+try:
+    import speech_recognition as sr
+    import pyttsx3
 
+    AUDIO_AVAILABLE = True
+except ImportError:
+    AUDIO_AVAILABLE = False
 
-def extract_incident_details(text):
-    """
-    Extracts caller name, phone number, location, case detail, and date/time of incident
-    from a given string using the Gemini API. It identifies missing information and
-    formulates questions to ask, returning the entire object as a JSON string.
+load_dotenv()
 
-    Args:
-        text (str): The input string containing incident details.
+# ------------- CONFIGURATION ----------------
+# "gemini" or "stub" (offline, regex-based; for tests and benchmarks)
+EXTRACTION_BACKEND = os.getenv("MOSAIC_EXTRACTION_BACKEND", "gemini")
+GEMINI_MODEL = "gemini-2.0-flash"
+EXTRACTION_CACHE_SIZE = 256  # transcripts whose extraction is kept
+EXTRACTION_RETRIES = 3  # attempts per transcript before giving up
+RETRY_BASE_DELAY = 0.5  # seconds; doubled per attempt, fully jittered
+RETRY_MAX_DELAY = 8.0
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}  # HTTP statuses worth retrying
 
-    Returns:
-        str: A JSON string containing the extracted details and questions,
-             or an error message if the API call fails or parsing issues occur.
-    """
-    try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
 
-        prompt = f"""
+def build_extraction_prompt(text):
+    return f"""
         Analyze the following incident report text, which may be a transcript of a conversation.
         Extract the key information. The conversation might include explicit questions and answers.
         Return the information as a JSON object with the following keys:
@@ -43,18 +49,219 @@ def extract_incident_details(text):
         "{text}"
         """
 
-        response = model.generate_content(
+
+FIELD_DESCRIPTIONS = {
+    "caller_name": "(string) The name of the person reporting the incident.",
+    "phone_number": "(string) The contact phone number.",
+    "location": "(string) The location where the incident occurred.",
+    "case_detail": "(string) A brief description of the incident or problem.",
+    "incident_datetime": "(string) The date and/or time of the incident.",
+}
+
+
+def build_incremental_prompt(answer, keys, question=None):
+    """Prompt for just the given keys from one answer; its size does not grow per turn."""
+    fields = "\n".join(f'        - "{key}": {FIELD_DESCRIPTIONS[key]}' for key in keys)
+    asked = f'Agent Question: "{question}"\n        ' if question else ""
+    return f"""
+        A caller is reporting a grievance. Extract only the following fields from their
+        latest answer. Return a JSON object with exactly these keys; use null for any
+        field the answer does not give.
+{fields}
+
+        {asked}User Answer: "{answer}"
+        """
+
+
+# ------------- Backends ----------------
+class ExtractionBackend:
+    """Turns an extraction prompt into the model's JSON reply (a string)."""
+
+    name = "base"
+
+    def generate_json(self, prompt, text):
+        """Raise on failure; transient failures (is_transient) are retried."""
+        raise NotImplementedError
+
+
+class GeminiBackend(ExtractionBackend):
+    """Gemini, configured and instantiated once on first use."""
+
+    name = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                    self._genai = genai
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_json(self, prompt, text):
+        response = self.model.generate_content(
             prompt,
-            generation_config=genai.types.GenerationConfig(
+            generation_config=self._genai.types.GenerationConfig(
                 response_mime_type="application/json"
             ),
         )
+        return response.text
+
+
+class StubBackend(ExtractionBackend):
+    """
+    Offline stand-in for Gemini. Replies come from `reply(prompt, text)` if
+    given, else from the regex extractors in HelplineProcessor.
+    """
+
+    name = "stub"
+
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.calls = 0
+        self._processor = None
+
+    def generate_json(self, prompt, text):
+        self.calls += 1
+        if self.reply is not None:
+            return self.reply(prompt, text)
+        if self._processor is None:
+            from .spam_filtering import HelplineProcessor
+
+            self._processor = HelplineProcessor()
+        p = self._processor
+        data = {
+            "caller_name": p.extract_name(text, "english"),
+            "phone_number": p.extract_phone_number(text),
+            "location": p.extract_location(text, "english"),
+            "case_detail": p.extract_grievance(text, "english"),
+            "incident_datetime": p.extract_time(text, "english") or None,
+        }
+        _, _, questions = p.determine_completeness(
+            {
+                "name": data["caller_name"],
+                "number": data["phone_number"],
+                "grievance": data["case_detail"],
+                "location": data["location"],
+                "time": data["incident_datetime"],
+            }
+        )
+        data["questions"] = questions
+        return json.dumps(data)
+
+
+BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
 
-        parsed_data = json.loads(response.text)
+
+def get_extraction_backend(name=None):
+    """Shared backend instance for a name in BACKENDS (default: MOSAIC_EXTRACTION_BACKEND)."""
+    name = name or EXTRACTION_BACKEND
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = BACKENDS[name]()
+            _backends[name] = backend
+        return backend
+
+
+# ------------- Response cache ----------------
+_response_cache = OrderedDict()  # prompt hash -> parsed reply
+_response_cache_lock = threading.Lock()
+EXTRACTION_STATS = {"calls": 0, "cache_hits": 0, "retries": 0, "failures": 0}
+
+
+def _cache_key(backend, prompt):
+    model_name = getattr(backend, "model_name", "")
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{backend.name}:{model_name}:{digest}"
+
+
+def is_transient(error):
+    """Whether a failed extraction may succeed on retry: timeouts, 429 and 5xx."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core errors carry their HTTP status as an int `code`
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code in TRANSIENT_STATUS
+
+
+def _call_with_retries(backend, prompt, text):
+    # Auth, invalid-argument and unparseable-reply errors fail on the first attempt
+    for attempt in range(EXTRACTION_RETRIES):
+        try:
+            return json.loads(backend.generate_json(prompt, text))
+        except Exception as e:
+            if attempt == EXTRACTION_RETRIES - 1 or not is_transient(e):
+                raise
+            EXTRACTION_STATS["retries"] += 1
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+            print(f"[WARN] Extraction attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def request_extraction(prompt, text, backend=None):
+    """
+    Parsed JSON reply to an extraction prompt (a fresh dict). Served from the
+    response cache when the same prompt was sent before; raises once retries
+    are exhausted.
+    """
+    backend = backend or get_extraction_backend()
+    key = _cache_key(backend, prompt)
+
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+            EXTRACTION_STATS["cache_hits"] += 1
+
+    if cached is None:
+        EXTRACTION_STATS["calls"] += 1
+        cached = _call_with_retries(backend, prompt, text)
+        with _response_cache_lock:
+            _response_cache[key] = cached
+            while len(_response_cache) > EXTRACTION_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+
+    return dict(cached)
+
+
+def extract_incident_details(text, backend=None):
+    """
+    Extracts caller name, phone number, location, case detail, and date/time of incident
+    from a given string using the Gemini API. It identifies missing information and
+    formulates questions to ask, returning the entire object as a JSON string.
+
+    Replies are cached by transcript hash, so an identical prompt is only sent
+    once; transient failures are retried with jittered exponential backoff.
+
+    Args:
+        text (str): The input string containing incident details.
+        backend (ExtractionBackend): Defaults to MOSAIC_EXTRACTION_BACKEND.
+
+    Returns:
+        str: A JSON string containing the extracted details and questions,
+             or an error message if the API call fails or parsing issues occur.
+    """
+    try:
+        parsed_data = request_extraction(build_extraction_prompt(text), text, backend)
         parsed_data["report_datetime"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         return json.dumps(parsed_data, indent=4)
 
     except Exception as e:
+        EXTRACTION_STATS["failures"] += 1
         print(f"[ERROR] Gemini API call failed: {e}")
         return json.dumps(
             {"error": f"An error occurred with the API: {e}", "original_text": text},
@@ -62,6 +269,174 @@ def extract_incident_details(text):
         )
 
 
+# ------------- Tiered extraction ----------------
+# HelplineProcessor field name -> extraction JSON key
+FIELD_KEYS = {
+    "name": "caller_name",
+    "number": "phone_number",
+    "grievance": "case_detail",
+    "location": "location",
+    "time": "incident_datetime",
+}
+
+
+# Only a name the caller introduces explicitly is trusted without the LLM
+EXPLICIT_NAME_PATTERN = re.compile(r"\b(?:my name is|name:|naam:)", re.IGNORECASE)
+
+
+class TieredExtractor:
+    """
+    Regex/gazetteer extraction first, the LLM only for what is still missing.
+
+    The caller's own words go through HelplineProcessor's extractors, but
+    only high-precision hits are final (see extract_local); if those fill
+    every field the LLM is not called at all. Otherwise the transcript goes
+    to extract_incident_details and the missing fields are taken from its
+    reply. Follow-up questions come from determine_completeness. `stats`
+    counts turns, LLM calls and turns that avoided one.
+    """
+
+    def __init__(self, processor=None, backend=None):
+        if processor is None:
+            from .spam_filtering import HelplineProcessor
+
+            processor = HelplineProcessor()
+        self.processor = processor
+        self.backend = backend
+        self.stats = {"turns": 0, "llm_calls": 0, "llm_avoided": 0, "llm_errors": 0}
+
+    def extract_local(self, text, asked=None):
+        """
+        Field values that can be trusted without the LLM: phone numbers,
+        names after an explicit "my name is", locations the gazetteer places
+        in UP (by name or PIN), sentences with a grievance keyword and
+        explicit time phrases. Looser matches ("I am ...", the longest
+        sentence as the grievance) are left to the LLM, except for `asked`,
+        the field the text answers a question about.
+        """
+        p = self.processor
+        name = EXPLICIT_NAME_PATTERN.search(text)
+        location = p.extract_location(text, "english")
+        fields = {
+            "name": p.extract_name(text[name.start():], "english") if name else None,
+            "number": p.extract_phone_number(text),
+            "grievance": p.extract_grievance_sentence(text),
+            "location": location if p.check_up_location(location) else None,
+            "time": p.extract_time(text, "english"),
+        }
+        # A direct answer to "what is your name / problem / location" is
+        # taken even when it only loosely matches
+        if asked == "name" and not fields["name"]:
+            fields["name"] = p.extract_name(text, "english")
+        elif asked == "grievance" and not fields["grievance"]:
+            fields["grievance"] = p.extract_grievance(text, "english")
+        elif asked == "location" and not fields["location"]:
+            fields["location"] = location
+        return fields
+
+    def asked_field(self, question):
+        """The field a determine_completeness follow-up question asks for, or None."""
+        _, missing, questions = self.processor.determine_completeness({})
+        field = dict(zip(questions, missing)).get(question)
+        return "grievance" if field == "description" else field
+
+    def extract_llm(self, transcript, missing):
+        """LLM values for the missing fields; raises RuntimeError on an API error."""
+        data = json.loads(extract_incident_details(transcript, backend=self.backend))
+        if "error" in data:
+            raise RuntimeError(data["error"])
+        return {field: data.get(FIELD_KEYS[field]) for field in missing}
+
+    def extract(self, transcript, user_text=None):
+        """
+        Extraction JSON (as a dict) for a transcript, in the same shape as
+        extract_incident_details. `user_text` is what the caller said, without
+        the agent's questions; it defaults to the whole transcript.
+        """
+        self.stats["turns"] += 1
+        fields = self.extract_local(user_text if user_text is not None else transcript)
+        missing = self.missing_fields(fields)
+
+        error = None
+        if missing:
+            self.stats["llm_calls"] += 1
+            try:
+                for field, value in self.extract_llm(transcript, missing).items():
+                    if value:
+                        fields[field] = value
+            except RuntimeError as e:
+                self.stats["llm_errors"] += 1
+                error = str(e)
+        else:
+            self.stats["llm_avoided"] += 1
+
+        return self.result(fields, error)
+
+    def missing_fields(self, fields):
+        _, missing, _ = self.processor.determine_completeness(fields)
+        # determine_completeness reports "description" for the grievance field
+        return ["grievance" if m == "description" else m for m in missing]
+
+    def result(self, fields, error=None):
+        """Fields in the extract_incident_details JSON shape, with follow-up questions."""
+        _, _, questions = self.processor.determine_completeness(fields)
+        data = {FIELD_KEYS[field]: value or None for field, value in fields.items()}
+        data["questions"] = questions
+        data["report_datetime"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if error:
+            data["error"] = error
+        return data
+
+
+class ExtractionSession(TieredExtractor):
+    """
+    Structured state for one call, updated one answer at a time.
+
+    Each update runs the local extractors on the new answer alone and fills
+    only fields that are still empty, from trusted matches or from the
+    answer to the question asking for that field. If some remain, the LLM
+    gets just that answer, the question it answers and the missing field
+    names, so the prompt stays the same size however long the call runs.
+    Fields are never re-extracted once found. `stats["prompt_chars"]` totals what was sent.
+    """
+
+    def __init__(self, processor=None, backend=None):
+        super().__init__(processor, backend)
+        self.fields = dict.fromkeys(FIELD_KEYS)
+        self.stats["prompt_chars"] = 0
+
+    def update(self, answer, question=None):
+        """Merge one caller utterance into the state and return the current result."""
+        self.stats["turns"] += 1
+        local = self.extract_local(answer, self.asked_field(question))
+        for field in self.missing_fields(self.fields):
+            if local[field]:
+                self.fields[field] = local[field]
+
+        missing = self.missing_fields(self.fields)
+        error = None
+        if missing:
+            self.stats["llm_calls"] += 1
+            prompt = build_incremental_prompt(
+                answer, [FIELD_KEYS[field] for field in missing], question
+            )
+            self.stats["prompt_chars"] += len(prompt)
+            try:
+                reply = request_extraction(prompt, answer, self.backend)
+                for field in missing:
+                    if reply.get(FIELD_KEYS[field]):
+                        self.fields[field] = reply[FIELD_KEYS[field]]
+            except Exception as e:
+                self.stats["llm_errors"] += 1
+                EXTRACTION_STATS["failures"] += 1
+                print(f"[ERROR] Gemini API call failed: {e}")
+                error = f"An error occurred with the API: {e}"
+        else:
+            self.stats["llm_avoided"] += 1
+
+        return self.result(self.fields, error)
+
+
 class GrievanceAgent:
     def __init__(self, pause_threshold=1.0):
         """
@@ -73,6 +448,7 @@ class GrievanceAgent:
         self.tts_engine = pyttsx3.init()
 
         self.grievance_transcript = ""
+        self.session = None
 
         print("Calibrating microphone... Please be quiet for a moment.")
         with self.microphone as source:
@@ -131,21 +507,18 @@ class GrievanceAgent:
             return
 
         self.grievance_transcript = f"Initial statement: {initial_grievance}"
+        # Extraction state for this call; each turn sends only the new answer
+        self.session = ExtractionSession()
+        latest_answer, question_to_ask = initial_grievance, None
 
         while True:
             print("\n-------------------------------------------")
-            print("[SYSTEM] Processing transcript with Gemini...")
+            print("[SYSTEM] Processing latest answer...")
 
-            response_json = extract_incident_details(self.grievance_transcript)
-
-            try:
-                data = json.loads(response_json)
-            except json.JSONDecodeError:
-                self.speak(
-                    "I encountered a system error while processing your request. Please try again."
-                )
-                print(f"[ERROR] Failed to parse JSON: {response_json}")
-                break
+            if latest_answer:
+                data = self.session.update(latest_answer, question_to_ask)
+            response_json = json.dumps(data, indent=4)
+            print(f"[SYSTEM] Extraction stats: {self.session.stats}")
 
             if "error" in data:
                 self.speak(
@@ -174,6 +547,7 @@ class GrievanceAgent:
             self.speak(question_to_ask)
 
             answer = self.listen_for_speech()
+            latest_answer = answer
 
             if answer:
                 self.grievance_transcript += (
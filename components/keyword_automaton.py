@@ -0,0 +1,75 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over several named keyword vocabularies.
+
+    Every keyword of every group is found in one left-to-right pass over the
+    text, so matching costs O(len(text) + hits) however many keywords there
+    are. Matches are plain substrings (same as `keyword in text`), compared
+    lowercased; keywords may be multi-word or non-Latin ("street light",
+    "समस्या").
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (group, keyword) pairs ending there, including via fail links
+        self._out: List[List[Tuple[str, str]]] = [[]]
+        self.groups = {}
+        for group, keywords in groups.items():
+            self.groups[group] = sorted({k.lower() for k in keywords if k})
+            for keyword in self.groups[group]:
+                self._insert(group, keyword)
+        self._link()
+
+    def _insert(self, group: str, keyword: str):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((group, keyword))
+
+    def _link(self):
+        # Breadth-first, so a state's fail target is final before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, str]]:
+        """(start, group, keyword) for every occurrence, in order of end position."""
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for pos, char in enumerate(text.lower()):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for group, keyword in out[state]:
+                yield pos - len(keyword) + 1, group, keyword
+
+    def matches(self, text: str) -> Dict[str, Set[str]]:
+        """Distinct keywords found in text, per group (every group present)."""
+        found = {group: set() for group in self.groups}
+        for _, group, keyword in self.iter_matches(text):
+            found[group].add(keyword)
+        return found
+
+    def contains(self, text: str, group: str) -> bool:
+        """Whether any keyword of a group occurs in text."""
+        return any(hit_group == group for _, hit_group, _ in self.iter_matches(text))
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Dict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 
 
 @dataclass
@@ -11,6 +11,16 @@ class Grievance:
     location: str
     date_time: datetime
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Grievance":
+        return cls(
+            caller_name=data.get("caller_name"),
+            caller_phone_no=data.get("caller_phone_no"),
+            description=data.get("description"),
+            location=data.get("location"),
+            date_time=data.get("date_time"),
+        )
+
 
 @dataclass
 class CaseRecord:
@@ -22,6 +32,24 @@ class CaseRecord:
     priority: int
     score: int  # specify types if needed e.g., Dict[str, int]
     thread: List[Grievance] = field(default_factory=list)
+    status: str = "open"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CaseRecord":
+        return cls(
+            case_no=data["case_no"],
+            case_category=data.get("case_category", ""),
+            case_detail=data.get("case_detail", ""),
+            problem_start=data.get("problem_start", ""),
+            location=data.get("location", ""),
+            priority=data.get("priority", ""),
+            score=data.get("score", 0),
+            thread=[Grievance.from_dict(g) for g in data.get("thread", [])],
+            status=data.get("status", "open"),
+        )
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
 
 
 class Category:
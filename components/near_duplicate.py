@@ -0,0 +1,217 @@
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from typing import FrozenSet, NamedTuple
+
+import numpy as np
+
+# ------------- CONFIGURATION ----------------
+NUM_PERM = 64  # MinHash signature length
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows each
+SHINGLE_SIZE = 2  # word n-grams
+SIMILARITY_THRESHOLD = 0.6  # estimated Jaccard for a near-duplicate
+CAMPAIGN_THRESHOLD = 0.9  # estimated Jaccard for a copy of a campaign message
+CAMPAIGN_MIN_CALLERS = 5  # distinct numbers sending copies of one message
+CAMPAIGN_BURST = 600  # seconds within which those copies must arrive
+CAMPAIGN_MIN_SHINGLES = 8  # shorter texts are too generic to call copies
+CAMPAIGN_WINDOW = 3600  # seconds of submissions kept in the index
+MAX_ENTRIES = 100000  # submissions kept in the window at most
+BUCKET_SIZE = 64  # most recent submissions kept per LSH bucket
+
+_TOKEN = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Word n-grams of normalized text (lowercase, no punctuation, digits masked)."""
+    words = _TOKEN.findall(_DIGITS.sub("0", text.lower()))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with multiply-shift hashing over 64-bit shingle hashes."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, items):
+        if not items:
+            return np.full(len(self.a), np.iinfo(np.uint32).max, dtype=np.uint32)
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little")
+                for item in items
+            ],
+            dtype=np.uint64,
+        )
+        # (a * x + b) mod 2**64, top 32 bits; uint64 arithmetic wraps
+        with np.errstate(over="ignore"):
+            mixed = (np.outer(hashes, self.a) + self.b) >> np.uint64(32)
+        return mixed.min(axis=0).astype(np.uint32)
+
+
+class CampaignCheck(NamedTuple):
+    campaign: bool
+    callers: FrozenSet[str]  # distinct numbers in the near-duplicate cluster
+
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH over recent submissions from every caller.
+
+    Each submission's signature is split into bands; submissions sharing a
+    band bucket are candidates, and a candidate is a near-duplicate when the
+    signatures agree on at least `threshold` of their positions (an estimate
+    of the Jaccard similarity of their word shingles). A lookup touches only
+    the buckets of the new submission, each capped at its `bucket_size` most
+    recent entries, so its cost does not grow with the window. Submissions
+    older than `window` seconds, or beyond `max_entries`, are dropped from
+    the front of a time-ordered queue.
+
+    Many callers describing the same outage in similar words is normal, so
+    near-duplicates alone never make a campaign. A campaign is a copied
+    message: at least `min_shingles` shingles long, sent by `min_callers`
+    distinct numbers within `burst` seconds with similarity of at least
+    `campaign_threshold`. When that first happens every copy is flagged, not
+    just the one that tipped it over; campaign_numbers() lists the flagged
+    callers still in the window, and a later copy of any flagged submission
+    is a campaign member however many of the others have aged out.
+    """
+
+    def __init__(
+        self,
+        num_perm=NUM_PERM,
+        bands=BANDS,
+        threshold=SIMILARITY_THRESHOLD,
+        campaign_threshold=CAMPAIGN_THRESHOLD,
+        min_callers=CAMPAIGN_MIN_CALLERS,
+        burst=CAMPAIGN_BURST,
+        min_shingles=CAMPAIGN_MIN_SHINGLES,
+        window=CAMPAIGN_WINDOW,
+        max_entries=MAX_ENTRIES,
+        bucket_size=BUCKET_SIZE,
+        clock=time.time,
+    ):
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.campaign_threshold = campaign_threshold
+        self.min_callers = min_callers
+        self.burst = burst
+        self.min_shingles = min_shingles
+        self.window = window
+        self.max_entries = max_entries
+        self.bucket_size = bucket_size
+        self.clock = clock
+        self._entries = deque()  # (entry_id, timestamp, phone_number, signature, band keys)
+        self._buckets = {}  # band key -> {entry_id: (phone_number, signature, timestamp)}
+        self._flagged = {}  # entry_id -> phone_number of campaign submissions
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, signature):
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _expire(self, now):
+        while self._entries and (
+            now - self._entries[0][1] > self.window or len(self._entries) > self.max_entries
+        ):
+            entry_id, _, _, _, keys = self._entries.popleft()
+            self._flagged.pop(entry_id, None)
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.pop(entry_id, None)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def add(self, text, phone_number=None):
+        """
+        Index a submission and return the distinct phone numbers (including
+        this one) whose recent submissions are near-duplicates of it.
+        """
+        return set(self.check(text, phone_number).callers)
+
+    def check(self, text, phone_number=None) -> CampaignCheck:
+        """Index a submission and report whether it belongs to a campaign."""
+        text_shingles = shingles(text)
+        signature = self.hasher.signature(text_shingles)
+        keys = self._band_keys(signature)
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            callers = {phone_number} if phone_number else set()
+            copiers = set(callers)  # numbers that sent a copy within the burst
+            copies = []  # entry ids of the copies, at any age
+            candidates = {}
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            if candidates:
+                entry_ids = list(candidates)
+                numbers, signatures, timestamps = zip(*candidates.values())
+                agreement = (np.vstack(signatures) == signature).mean(axis=1)
+                for entry_id, number, timestamp, similarity in zip(
+                    entry_ids, numbers, timestamps, agreement
+                ):
+                    if similarity >= self.threshold and number:
+                        callers.add(number)
+                    if similarity >= self.campaign_threshold:
+                        copies.append(entry_id)
+                        if number and now - timestamp <= self.burst:
+                            copiers.add(number)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries.append((entry_id, now, phone_number, signature, keys))
+            for key in keys:
+                bucket = self._buckets.setdefault(key, {})
+                bucket[entry_id] = (phone_number, signature, now)
+                if len(bucket) > self.bucket_size:
+                    del bucket[next(iter(bucket))]
+
+            campaign = len(text_shingles) >= self.min_shingles and (
+                len(copiers) >= self.min_callers
+                or any(copy in self._flagged for copy in copies)
+            )
+            if campaign:
+                # Flag every copy, including the submissions before this one
+                for copy in copies:
+                    self._flagged[copy] = candidates[copy][0]
+                self._flagged[entry_id] = phone_number
+            self._expire(now)
+        return CampaignCheck(campaign, frozenset(callers))
+
+    def is_campaign(self, text, phone_number=None):
+        """Index a submission; True when it is a copy of a campaign message."""
+        return self.check(text, phone_number).campaign
+
+    def campaign_numbers(self):
+        """Phone numbers of every flagged campaign submission still in the window."""
+        with self._lock:
+            self._expire(self.clock())
+            return {number for number in self._flagged.values() if number}
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    """Process-wide index shared by every HelplineProcessor."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex()
+    return _index
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import threading
+
+
+class PriorityIndex:
+    """
+    Open cases ordered by descending score, per department and overall.
+
+    Each department keeps a binary heap of (-score, seq, case_no) entries.
+    Rescoring a case pushes a fresh entry and closing it just forgets the
+    live one, so both are O(log n); superseded entries are skipped lazily
+    when read and dropped when a heap grows to more than twice its live size.
+    top_k() and iter_cases() walk the heap tree best-first without popping,
+    so reading the top k costs O(k log k) plus the stale entries passed over.
+    """
+
+    ALL = None  # heap key covering every department
+
+    def __init__(self):
+        self._heaps = {}
+        self._live = {}  # case_no -> (department, score, seq)
+        self._counts = {}  # department -> live entries
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, case_no):
+        return case_no in self._live
+
+    def update(self, case_no, department, score, status="open"):
+        """Record a case's current department, score and status."""
+        with self._lock:
+            self.remove(case_no)
+            if status != "open" or score is None:
+                return
+            seq = next(self._seq)
+            entry = (-score, seq, case_no)
+            self._live[case_no] = (department, score, seq)
+            for key in (department, self.ALL):
+                heapq.heappush(self._heaps.setdefault(key, []), entry)
+                self._counts[key] = self._counts.get(key, 0) + 1
+
+    def remove(self, case_no):
+        """Drop a case (closed or deleted); its heap entries become stale."""
+        with self._lock:
+            current = self._live.pop(case_no, None)
+            if current is None:
+                return
+            for key in (current[0], self.ALL):
+                self._counts[key] -= 1
+                self._maybe_compact(key)
+
+    def _is_live(self, entry):
+        current = self._live.get(entry[2])
+        return current is not None and current[2] == entry[1]
+
+    def _maybe_compact(self, key):
+        heap = self._heaps.get(key)
+        if heap and len(heap) > 2 * self._counts.get(key, 0) + 64:
+            heap[:] = [entry for entry in heap if self._is_live(entry)]
+            heapq.heapify(heap)
+
+    def _walk(self, department):
+        # Best-first walk over the heap array without popping: the children
+        # of entry i are 2i+1 and 2i+2. The caller holds the lock.
+        heap = self._heaps.get(department, [])
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            if self._is_live(entry):
+                yield entry[2], -entry[0]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def top_k(self, department=ALL, k=20):
+        """The k highest-scoring open cases as (case_no, score) pairs."""
+        with self._lock:
+            return list(itertools.islice(self._walk(department), k))
+
+    def iter_cases(self, department=ALL, page=50):
+        """
+        (case_no, score) pairs of open cases, highest score first.
+
+        Read in doubling pages so the index is not locked while the caller
+        consumes it; cases rescored in between are yielded once.
+        """
+        seen = set()
+        k = page
+        while True:
+            batch = self.top_k(department, k)
+            for case_no, score in batch:
+                if case_no not in seen:
+                    seen.add(case_no)
+                    yield case_no, score
+            if len(batch) < k:
+                return
+            k *= 2
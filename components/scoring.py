@@ -1,129 +1,96 @@
-import json
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import os
 
+from components.case_store import get_case_store
+from components.categories import get_category_registry
+from components.category_model import classifier_key, get_classifier
 
-def scoring():
-    path = os.getcwd()
-    categories = []
-    case_data = []
-    alpha = 0.5
-
-    # Initialize TF-IDF vectorizer
-    vectorizer = TfidfVectorizer(
-        stop_words="english",
-        lowercase=True,
-        ngram_range=(1, 2),  # Include both unigrams and bigrams
-        max_features=10000,
-    )
 
-    with open(f"{path}/data/categories_data.json", "r") as file:
-        data = json.load(file)
-        for i in data:
-            categories.append(i)
+def priority_for(final_score):
+    if final_score < (2 / 3):
+        return "low"
+    elif final_score < (4 / 3) and final_score > (2 / 3):
+        return "medium"
+    else:
+        return "high"
 
-    with open(f"{path}/data/test.json", "r") as file:
-        data = json.load(file)
-        for case in data:
-            case_data.append(case)
-
-    max_thread_len = max(len(case["thread"]) for case in case_data)
-
-    # Prepare all text data for vectorization
-    all_texts = []
-    case_descriptions = []
-
-    # Collect case descriptions
-    for case in case_data:
-        case_description = case["case_detail"]
-        case_descriptions.append(case_description)
-        all_texts.append(case_description)
 
-    # Collect all keywords from categories
-    all_keywords = []
-    for category in categories:
-        for keyword in category["keywords"]:
-            all_keywords.append(keyword)
-            all_texts.append(keyword)
-
-    # Fit the vectorizer on all texts
-    tfidf_matrix = vectorizer.fit_transform(all_texts)
+def scoring():
+    """
+    Score the cases that changed since the last pass.
+
+    A case's category and its base score (alpha * Wi + (1 - alpha) * category
+    accuracy) depend only on case_detail and the classifier, so they are kept
+    as "score_base" together with the classifier's key ("score_model") and
+    only recomputed when that key changes (a new categories file or
+    MOSAIC_CATEGORY_CLASSIFIER). New and appended-to cases get their
+    thread_length term refreshed; when the archive's longest thread changes,
+    every case is renormalized, which is plain arithmetic with no model work.
+    The longest thread and classifier key are stored with the cases, and
+    only cases whose fields actually changed are written back.
+    """
+    path = os.getcwd()
+    alpha = 0.5
 
-    # Split the matrix back into case descriptions and keywords
-    num_cases = len(case_descriptions)
-    case_vectors = tfidf_matrix[:num_cases]
-    keyword_vectors = tfidf_matrix[num_cases:]
+    categories_path = f"{path}/data/categories_data.json"
+    registry = get_category_registry(categories_path)
+    categories = registry.categories
+    model_key = classifier_key(categories_path)
+
+    store = get_case_store()
+    dirty = store.dirty_case_nos()
+    max_thread_len = store.max_thread_len()
+    if max_thread_len == 0:
+        return
+
+    if store.scoring_state() != (max_thread_len, model_key):
+        case_data = store.cases()
+    else:
+        case_data = store.get_many(dirty)
+
+    # Categorize only cases never scored, or scored by another classifier
+    unscored = [
+        case
+        for case in case_data
+        if "score_base" not in case or case.get("score_model") != model_key
+    ]
+    base_updates = {}
+    if unscored:
+        # Prefitted classifier (MOSAIC_CATEGORY_CLASSIFIER): one batched product.
+        # argmax keeps the first category on ties; categories without keywords score 0.
+        model = get_classifier(categories_path)
+        best, max_scores = model.classify([case["case_detail"] for case in unscored])
+
+        category_weights = (
+            np.array([category["semantic_weight"] for category in categories])
+            / registry.total_weight
+        )
+        base_scores = (alpha * category_weights[best]) + ((1 - alpha) * max_scores)
+        for i, case in enumerate(unscored):
+            base_updates[case["case_no"]] = {
+                "case_category": registry.id_of(categories[best[i]]),
+                "score_base": float(base_scores[i]),
+                "score_model": model_key,
+            }
 
     # Process each case
-    for i, case in enumerate(case_data):
-        case_vector = case_vectors[i]
-
-        max_score = -1  # Initialize to -1 to ensure at least one category is selected
-        selected_category = None
-        total_weights = 0
-        keyword_start_idx = 0
-
-        # Calculate total weights first
-        for category in categories:
-            total_weights += category["semantic_weight"]
-
-        # Reset keyword index
-        keyword_start_idx = 0
-
-        for category in categories:
-            keyword_count = len(category["keywords"])
-
-            if keyword_count == 0:
-                category_score = 0
-            else:
-                # Get vectors for this category's keywords
-                category_keyword_vectors = keyword_vectors[
-                    keyword_start_idx : keyword_start_idx + keyword_count
-                ]
-
-                # Calculate similarities between case and each keyword
-                similarities = cosine_similarity(
-                    case_vector, category_keyword_vectors
-                ).flatten()
-
-                # Average similarity for this category
-                category_score = np.mean(similarities)
-
-            if category_score > max_score:
-                max_score = category_score
-                selected_category = category
-
-            keyword_start_idx += keyword_count
-
-        # If no category was selected (shouldn't happen with max_score = -1), select the first category
-        if selected_category is None:
-            selected_category = categories[0]
-            max_score = 0
-
-        case["case_category"] = selected_category
+    updates = {}
+    for case in case_data:
+        fields = base_updates.get(case["case_no"], {})
+        score_base = fields.get("score_base", case.get("score_base"))
 
-        category_weight = selected_category["semantic_weight"] / total_weights
+        final_score = score_base + (len(case["thread"]) / max_thread_len)
 
-        final_score = (
-            (alpha * category_weight)
-            + ((1 - alpha) * max_score)
-            + (len(case["thread"]) / max_thread_len)
+        fields = dict(
+            fields,
+            score=final_score,
+            priority=priority_for(final_score),
+            score_threads=len(case["thread"]),
         )
+        changed = {k: v for k, v in fields.items() if case.get(k) != v}
+        if changed:
+            updates[case["case_no"]] = changed
 
-        case["score"] = final_score
-
-        priority = ""
-
-        if final_score < (2 / 3):
-            priority = "low"
-        elif final_score < (4 / 3) and final_score > (2 / 3):
-            priority = "medium"
-        else:
-            priority = "high"
-
-        case["priority"] = priority
-
-    with open(f"{path}/data/test.json", "w") as f:
-        json.dump(case_data, f)
+    store.update_many(updates)
+    store.mark_clean(dirty)
+    store.save_scoring_state(max_thread_len, model_key)
@@ -1,10 +1,19 @@
+import importlib.util
 import json
+import os
 import re
 import datetime
-from typing import Dict, List, Tuple, Optional
-from collections import defaultdict
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 
+from .keyword_automaton import KeywordAutomaton
 from .models import Grievance
+from .gazetteer import get_gazetteer
+from .near_duplicate import NearDuplicateIndex, get_near_duplicate_index
+from .spam_tracker import SubmissionTracker, get_submission_tracker
 
 try:
     from langdetect import detect
@@ -13,120 +22,201 @@ try:
 except ImportError:
     LANGDETECT_AVAILABLE = False
 
+# spaCy and transformers are heavy to import; only check they are installed
+# here and import them when a model is actually loaded.
+SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+
 try:
-    import spacy
+    import dateparser
 
-    SPACY_AVAILABLE = True
+    DATEPARSER_AVAILABLE = True
 except ImportError:
-    SPACY_AVAILABLE = False
+    DATEPARSER_AVAILABLE = False
 
-try:
+
+# NER backend used by the extractors: "regex" (no model), "spacy" or "transformer"
+NLP_BACKEND = os.getenv("MOSAIC_NLP_BACKEND", "regex")
+NLP_BACKENDS = ("regex", "spacy", "transformer")
+SPACY_MODEL = "en_core_web_lg"
+NER_MODEL = "dbmdz/bert-large-cased-finetuned-conll03-english"
+
+# Models loaded by any processor, shared by every instance in the process
+_shared_models = {}
+_shared_models_lock = threading.Lock()
+
+
+def _load_spacy_model():
+    if not SPACY_AVAILABLE:
+        return None
+    import spacy
+
+    try:
+        return spacy.load(SPACY_MODEL)
+    except OSError:
+        print(
+            "English spaCy model not found. Install with: python -m spacy download en_core_web_lg"
+        )
+        return None
+
+
+def _load_ner_pipeline():
+    if not TRANSFORMERS_AVAILABLE:
+        return None
     from transformers import pipeline
 
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+    try:
+        return pipeline("ner", model=NER_MODEL, aggregation_strategy="simple")
+    except Exception:
+        print("Could not load transformers NER pipeline.")
+        return None
 
-try:
-    import dateparser
 
-    DATEPARSER_AVAILABLE = True
-except ImportError:
-    DATEPARSER_AVAILABLE = False
+# ------------- Patterns ----------------
+# Compiled once at import and shared by every processor.
+NAME_PATTERNS = [
+    re.compile(
+        r"(?:my name is|i am|i\'m|this is|name:|naam:)[\s,]+([A-Za-z .]{2,60})",
+        re.IGNORECASE,
+    ),
+    re.compile(r"(?:this is|speaking|calling)[\s,]+([A-Za-z .]{2,60})", re.IGNORECASE),
+]
+NAME_STOP_PATTERN = re.compile(
+    r"[.,;\d]|\b(from|in|at|of|se|pin|contact|phone|number|area|city|district|village|sector|block|ward|and|but|or|calling|speaking|am|is|are|was|were|have|has|had|will|shall|can|may|should|would|could|might|must|do|does|did|to|for|with|by|on|as|if|that|than|then|when|while|where|who|whom|whose|which|what|how|why)\b"
+)
+NAME_FALLBACK_PATTERN = re.compile(r"(?:i am|name:)[\s,]*([A-Za-z]{2,20})", re.IGNORECASE)
+NON_NAME_CHARS = re.compile(r"[^A-Za-z .]")
+WHITESPACE = re.compile(r"\s+")
+NON_DIGITS = re.compile(r"\D")
+
+# Indian phone number patterns
+PHONE_PATTERNS = [
+    re.compile(r"(?:\+91|91)?\s*[6-9]\d{9}", re.IGNORECASE),  # Indian mobile numbers
+    re.compile(
+        r"(?:phone|number|contact|mob|mobile)[\s:]*(?:\+91|91)?\s*([6-9]\d{9})",
+        re.IGNORECASE,
+    ),
+    re.compile(r"([6-9]\d{9})", re.IGNORECASE),  # Simple 10-digit number
+]
+
+CITY_PIN_PATTERN = re.compile(r"from\s+([A-Za-z ]+)(?:,?\s*PIN\s*(\d{6}))?", re.IGNORECASE)
+UP_PIN_PATTERN = re.compile(r"\b(2\d{5})\b")
+PIN_WORD_PATTERN = re.compile(r"pin", re.IGNORECASE)
+AREA_PATTERN = re.compile(
+    r"(?:in|at|area|city|district|village|sector|block|ward)\s+([A-Za-z ]{3,40})",
+    re.IGNORECASE,
+)
+
+SENTENCE_SPLIT = re.compile(r"[.!?।]")
+LEADING_NON_WORD = re.compile(r"^[^\w]*")
+TRAILING_NON_WORD = re.compile(r"[^\w]*$")
+
+TIME_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), typ)
+    for pattern, typ in [
+        (r"for the past (\d+) days?", "days"),
+        (r"for past (\d+) days?", "days"),
+        (r"for (\d+) days?", "days"),
+        (r"since the last (\d+) days?", "days"),
+        (r"since last (\d+) days?", "days"),
+        (r"for (\d+) weeks?", "weeks"),
+        (r"for (\d+) months?", "months"),
+        (r"since (yesterday)", "yesterday"),
+        (r"since (today)", "today"),
+        (r"since last week", "week"),
+        (r"Time[:\s-]*(\d+)[-\s]*days?", "days"),
+        (r"(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})", "date"),
+        (r"happened (\d+) days? ago", "days"),
+        (r"happened yesterday", "yesterday"),
+    ]
+]
 
 
 class HelplineProcessor:
     """Main class for processing helpline transcriptions."""
 
-    def __init__(self):
-        """Initialize the processor with required models and data."""
-        self.nlp_en = None
-        self.ner_pipeline = None
-        self.spam_tracker = defaultdict(list)  # Track repeated submissions
-        self.load_models()
+    def __init__(
+        self,
+        nlp_backend: Optional[str] = None,
+        share_models: bool = True,
+        spam_tracker=None,
+        duplicate_index=None,
+    ):
+        """
+        Initialize the processor with reference data. NLP models are not loaded
+        here but on first use, and only the one the backend needs.
+
+        nlp_backend: "regex", "spacy" or "transformer" (default: MOSAIC_NLP_BACKEND).
+        share_models: reuse models already loaded by other processors in this process.
+        spam_tracker: SubmissionTracker for the bulk-submission check (default:
+            the process-wide one persisted under data/).
+        duplicate_index: NearDuplicateIndex for the cross-caller campaign check
+            (default: the process-wide one).
+        """
+        self.nlp_backend = nlp_backend or NLP_BACKEND
+        if self.nlp_backend not in NLP_BACKENDS:
+            raise ValueError(
+                f"Unknown NLP backend: {self.nlp_backend} "
+                f"(supported: {', '.join(NLP_BACKENDS)})"
+            )
+        self._models = _shared_models if share_models else {}
+        # Track repeated submissions
+        self.spam_tracker = (
+            spam_tracker if spam_tracker is not None else get_submission_tracker()
+        )
+        # Recent submissions from all callers, for coordinated campaigns
+        self.duplicate_index = (
+            duplicate_index if duplicate_index is not None else get_near_duplicate_index()
+        )
         self.setup_data()
 
+    def _model(self, key, loader):
+        if key not in self._models:
+            with _shared_models_lock:
+                if key not in self._models:
+                    # A failed load is cached as None so it is not retried per call
+                    self._models[key] = loader()
+        return self._models[key]
+
+    @property
+    def nlp_en(self):
+        """spaCy pipeline, loaded on first access when the backend is "spacy"."""
+        if self.nlp_backend != "spacy":
+            return None
+        return self._model(("spacy", SPACY_MODEL), _load_spacy_model)
+
+    @property
+    def ner_pipeline(self):
+        """Transformers NER pipeline, loaded on first access when the backend is "transformer"."""
+        if self.nlp_backend != "transformer":
+            return None
+        return self._model(("transformer", NER_MODEL), _load_ner_pipeline)
+
     def load_models(self):
-        """Load NLP models and pipelines."""
-        try:
-            # Load spaCy models if available
-            if SPACY_AVAILABLE:
-                try:
-                    self.nlp_en = spacy.load("en_core_web_lg")
-                except OSError:
-                    print(
-                        "English spaCy model not found. Install with: python -m spacy download en_core_web_lg"
-                    )
-
-            # Load transformers NER pipeline if available
-            if TRANSFORMERS_AVAILABLE:
-                try:
-                    self.ner_pipeline = pipeline(
-                        "ner",
-                        model="dbmdz/bert-large-cased-finetuned-conll03-english",
-                        aggregation_strategy="simple",
-                    )
-                except Exception:
-                    print(
-                        "Could not load transformers NER pipeline. Using spaCy instead."
-                    )
-
-        except Exception as e:
-            print(f"Warning: Could not load all models: {e}")
+        """Load the configured backend's model now instead of on first use."""
+        return self.nlp_en or self.ner_pipeline
+
+    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+        """Named entities as {"PERSON": [...], "LOCATION": [...]} from the configured backend."""
+        entities = {"PERSON": [], "LOCATION": []}
+        labels = {"PERSON": "PERSON", "PER": "PERSON", "GPE": "LOCATION", "LOC": "LOCATION"}
+        if self.nlp_en is not None:
+            for ent in self.nlp_en(text).ents:
+                if ent.label_ in labels:
+                    entities[labels[ent.label_]].append(ent.text.strip())
+        elif self.ner_pipeline is not None:
+            for ent in self.ner_pipeline(text):
+                if ent["entity_group"] in labels:
+                    entities[labels[ent["entity_group"]]].append(ent["word"].strip())
+        return entities
 
     def setup_data(self):
         """Setup reference data for location validation and spam detection."""
-        # UP PIN code ranges
-        self.up_pin_ranges = [
-            (200000, 299999),  # UP PIN codes
-        ]
+        # UP districts, localities and PIN codes
+        self.gazetteer = get_gazetteer()
 
-        # Common UP cities and areas
-        self.up_locations = {
-            "lucknow",
-            "kanpur",
-            "agra",
-            "varanasi",
-            "meerut",
-            "allahabad",
-            "prayagraj",
-            "bareilly",
-            "ghaziabad",
-            "noida",
-            "aligarh",
-            "gorakhpur",
-            "saharanpur",
-            "muzaffarnagar",
-            "mathura",
-            "firozabad",
-            "jhansi",
-            "unnao",
-            "sitapur",
-            "etawah",
-            "orai",
-            "hardoi",
-            "fatehpur",
-            "ayodhya",
-            "faizabad",
-            "sultanpur",
-            "azamgarh",
-            "bulandshahr",
-            "hapur",
-            "sambhal",
-            "amroha",
-            "rampur",
-            "moradabad",
-            "shahjahanpur",
-            "farrukhabad",
-            "etah",
-            "mainpuri",
-            "budaun",
-            "bareilly",
-            "pilibhit",
-            "lakhimpur",
-            "sitapur",
-            "kheri",
-        }
+        # Every known UP place name and alias, lowercase
+        self.up_locations = set(self.gazetteer.names)
 
         # Grievance keywords
         self.grievance_keywords = {
@@ -172,23 +262,52 @@ class HelplineProcessor:
             "टेस्ट",
         ]
 
+        # Additional meaningful content check
+        self.meaningful_words = [
+            "issue",
+            "problem",
+            "help",
+            "complaint",
+            "fix",
+            "repair",
+            "broken",
+            "not working",
+            "burning",
+            "समस्या",
+            "परेशानी",
+            "मदद",
+            "ठीक",
+            "काम नहीं",
+            "खराब",
+        ]
+
+        self.build_keyword_automaton()
+
+    def build_keyword_automaton(self):
+        """
+        Index every keyword vocabulary in one automaton, so a transcript is
+        scanned once for all of them. Call again after changing the vocabularies.
+        """
+        self.keywords = KeywordAutomaton(
+            {
+                "grievance": [
+                    k for keywords in self.grievance_keywords.values() for k in keywords
+                ],
+                "spam": self.spam_indicators,
+                "meaningful": self.meaningful_words,
+            }
+        )
+
     def extract_name(self, text: str, language: str) -> Optional[str]:
         """Extract caller's name from the text. Improved: stop at punctuation, keywords, or numbers."""
-        name_patterns = [
-            r"(?:my name is|i am|i\'m|this is|name:|naam:)[\s,]+([A-Za-z .]{2,60})",
-            r"(?:this is|speaking|calling)[\s,]+([A-Za-z .]{2,60})",
-        ]
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 name = match.group(1)
                 # Stop at punctuation, keywords, or numbers
-                name = re.split(
-                    r"[.,;\d]|\b(from|in|at|of|se|pin|contact|phone|number|area|city|district|village|sector|block|ward|and|but|or|calling|speaking|am|is|are|was|were|have|has|had|will|shall|can|may|should|would|could|might|must|do|does|did|to|for|with|by|on|as|if|that|than|then|when|while|where|who|whom|whose|which|what|how|why)\b",
-                    name,
-                )[0]
-                name = re.sub(r"[^A-Za-z .]", "", name).strip()
-                name = re.sub(r"\s+", " ", name).strip(". ")
+                name = NAME_STOP_PATTERN.split(name)[0]
+                name = NON_NAME_CHARS.sub("", name).strip()
+                name = WHITESPACE.sub(" ", name).strip(". ")
                 # Avoid extracting city names as names
                 if (
                     name
@@ -197,29 +316,25 @@ class HelplineProcessor:
                 ):
                     return name
         # Fallback: try to extract after 'I am' or 'Name:'
-        fallback = re.search(
-            r"(?:i am|name:)[\s,]*([A-Za-z]{2,20})", text, re.IGNORECASE
-        )
+        fallback = NAME_FALLBACK_PATTERN.search(text)
         if fallback:
             name = fallback.group(1)
             if name and name.lower() not in self.up_locations:
                 return name
+        # Fallback: NER model, if the deployment enables one
+        if self.nlp_backend != "regex":
+            for name in self.extract_entities(text)["PERSON"]:
+                if name.lower() not in self.up_locations:
+                    return name
         return None
 
     def extract_phone_number(self, text: str) -> Optional[str]:
         """Extract phone number from the text."""
-        # Indian phone number patterns
-        phone_patterns = [
-            r"(?:\+91|91)?\s*[6-9]\d{9}",  # Indian mobile numbers
-            r"(?:phone|number|contact|mob|mobile)[\s:]*(?:\+91|91)?\s*([6-9]\d{9})",
-            r"([6-9]\d{9})",  # Simple 10-digit number
-        ]
-
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in PHONE_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
                 # Clean and validate
-                number = re.sub(r"\D", "", str(match))
+                number = NON_DIGITS.sub("", str(match))
                 if len(number) == 10 and number[0] in "6789":
                     return number
                 elif len(number) == 12 and number.startswith("91"):
@@ -230,8 +345,7 @@ class HelplineProcessor:
     def extract_location(self, text: str, language: str) -> Optional[str]:
         """Extract location information from the text. Improved: extract city and PIN, avoid extracting names as locations."""
         # Look for patterns like 'from <city>[, PIN <pincode>]' or 'in <area/city>'
-        city_pin_pattern = r"from\s+([A-Za-z ]+)(?:,?\s*PIN\s*(\d{6}))?"
-        match = re.search(city_pin_pattern, text, re.IGNORECASE)
+        match = CITY_PIN_PATTERN.search(text)
         if match:
             city = match.group(1).strip()
             pin = match.group(2)
@@ -241,44 +355,49 @@ class HelplineProcessor:
                 else:
                     return city.title()
         # Fallback: PIN code only
-        pin_match = re.search(r"\b(2\d{5})\b", text)
+        pin_match = UP_PIN_PATTERN.search(text)
         if pin_match:
             pin_code = pin_match.group(1)
             return f"PIN {pin_code}"
         # Fallback: city/area after 'in', 'at', 'area', etc.
-        loc_pattern = r"(?:in|at|area|city|district|village|sector|block|ward)\s+([A-Za-z ]{3,40})"
-        match = re.search(loc_pattern, text, re.IGNORECASE)
+        match = AREA_PATTERN.search(text)
         if match:
             loc = match.group(1).strip()
             if loc.lower() not in self.up_locations and loc.lower() not in text.lower():
                 return loc.title()
-        # Fallback: known UP locations in text
-        for up_loc in self.up_locations:
-            if up_loc in text.lower():
-                return up_loc.title()
+        # Fallback: known UP place mentioned earliest in the text
+        place = self.gazetteer.first_place(text)
+        if place:
+            return place[0].title()
+        # Fallback: NER model, if the deployment enables one
+        if self.nlp_backend != "regex":
+            locations = self.extract_entities(text)["LOCATION"]
+            if locations:
+                return locations[0].title()
+        return None
+
+    def extract_grievance_sentence(self, text: str) -> Optional[str]:
+        """First sentence containing a grievance keyword, or None."""
+        for sentence in SENTENCE_SPLIT.split(text):
+            sentence = sentence.strip()
+            if len(sentence) > 10:  # Minimum length
+                if self.keywords.contains(sentence, "grievance"):
+                    # Clean up the sentence
+                    grievance = LEADING_NON_WORD.sub("", sentence)
+                    grievance = TRAILING_NON_WORD.sub("", grievance)
+                    if len(grievance) > 15:  # Ensure meaningful content
+                        return grievance[:200]  # Limit length
         return None
 
     def extract_grievance(self, text: str, language: str) -> Optional[str]:
         """Extract the main grievance description."""
         # Look for sentences containing grievance keywords
-        grievance_keywords = self.grievance_keywords.get(
-            language, self.grievance_keywords["english"]
-        )
-
-        sentences = re.split(r"[.!?।]", text)
-
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) > 10:  # Minimum length
-                for keyword in grievance_keywords:
-                    if keyword.lower() in sentence.lower():
-                        # Clean up the sentence
-                        grievance = re.sub(r"^[^\w]*", "", sentence)
-                        grievance = re.sub(r"[^\w]*$", "", grievance)
-                        if len(grievance) > 15:  # Ensure meaningful content
-                            return grievance[:200]  # Limit length
+        grievance = self.extract_grievance_sentence(text)
+        if grievance:
+            return grievance
 
         # Fallback: return the longest sentence if no keywords found
+        sentences = SENTENCE_SPLIT.split(text)
         if sentences:
             longest = max(sentences, key=len).strip()
             if len(longest) > 15:
@@ -289,24 +408,8 @@ class HelplineProcessor:
     def extract_time(self, text: str, language: str) -> Optional[str]:
         """Extract time when the issue started. Output as DD-MM-YY. Handle more variants."""
         now = datetime.datetime.now()
-        patterns = [
-            (r"for the past (\d+) days?", "days"),
-            (r"for past (\d+) days?", "days"),
-            (r"for (\d+) days?", "days"),
-            (r"since the last (\d+) days?", "days"),
-            (r"since last (\d+) days?", "days"),
-            (r"for (\d+) weeks?", "weeks"),
-            (r"for (\d+) months?", "months"),
-            (r"since (yesterday)", "yesterday"),
-            (r"since (today)", "today"),
-            (r"since last week", "week"),
-            (r"Time[:\s-]*(\d+)[-\s]*days?", "days"),
-            (r"(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})", "date"),
-            (r"happened (\d+) days? ago", "days"),
-            (r"happened yesterday", "yesterday"),
-        ]
-        for pattern, typ in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, typ in TIME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 if typ == "days":
                     days = int(match.group(1))
@@ -343,23 +446,31 @@ class HelplineProcessor:
         self, text: str, phone_number: Optional[str] = None
     ) -> Tuple[bool, Optional[str]]:
         """Detect if the message is spam with improved logic."""
+        is_spam, spam_reason = self.detect_content_spam(text)
+        if is_spam:
+            return is_spam, spam_reason
+        return self.detect_repeat_spam(text, phone_number)
+
+    def detect_content_spam(self, text: str) -> Tuple[bool, Optional[str]]:
+        """Spam checks that depend only on the text itself (no shared state)."""
         text_lower = text.lower()
+        # One pass over the text for every keyword vocabulary
+        hits = self.keywords.matches(text_lower)
 
         # Check for spam indicators - but be more contextual
         spam_trigger_count = 0
-        for indicator in self.spam_indicators:
-            if indicator in text_lower:
-                # If it's just a greeting but has real content, don't flag as spam
-                if indicator in ["hello", "hi", "namaste"] and len(text.split()) > 8:
-                    # Check if there's substantial content after the greeting
-                    continue
-                elif (
-                    indicator in ["test", "testing", "check"] and len(text.split()) < 6
-                ):
-                    # Only flag short test messages
-                    spam_trigger_count += 1
-                elif indicator in ["मजाक", "टेस्ट", "time pass"]:
-                    spam_trigger_count += 1
+        for indicator in hits["spam"]:
+            # If it's just a greeting but has real content, don't flag as spam
+            if indicator in ["hello", "hi", "namaste"] and len(text.split()) > 8:
+                # Check if there's substantial content after the greeting
+                continue
+            elif (
+                indicator in ["test", "testing", "check"] and len(text.split()) < 6
+            ):
+                # Only flag short test messages
+                spam_trigger_count += 1
+            elif indicator in ["मजाक", "टेस्ट", "time pass"]:
+                spam_trigger_count += 1
 
         # print(spam_trigger_count, len(text.split()))
         if spam_trigger_count > 0 and len(text.split()) < 4:
@@ -386,41 +497,28 @@ class HelplineProcessor:
                 return True, "Repeated phrases"
 
         # Check grievance keywords - be more lenient for Hindi
-        all_keywords = self.grievance_keywords["english"]
-        has_grievance_keyword = any(
-            keyword.lower() in text_lower for keyword in all_keywords
-        )
-
-        # Additional meaningful content check
-        meaningful_words = [
-            "issue",
-            "problem",
-            "help",
-            "complaint",
-            "fix",
-            "repair",
-            "broken",
-            "not working",
-            "burning",
-            "समस्या",
-            "परेशानी",
-            "मदद",
-            "ठीक",
-            "काम नहीं",
-            "खराब",
-        ]
-        has_meaningful_content = any(word in text_lower for word in meaningful_words)
+        has_grievance_keyword = bool(hits["grievance"])
+        has_meaningful_content = bool(hits["meaningful"])
 
         # Only flag as non-grievance if no keywords AND no meaningful content AND text is substantial
         if not has_grievance_keyword and not has_meaningful_content and len(text) > 15:
             return True, "Non-grievance content"
 
+        return False, None
+
+    def detect_repeat_spam(
+        self, text: str, phone_number: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Spam checks against earlier submissions (per-number and cross-caller).
+        These record the submission, so they must run once per message, in order.
+        """
         # Check for bulk submission (if phone number provided)
         if phone_number:
-            self.spam_tracker[phone_number].append(text[:50])  # Store first 50 chars
-            if len(self.spam_tracker[phone_number]) >= 3:
+            # Store first 50 chars
+            recent = self.spam_tracker.record(phone_number, text[:50])[-3:]
+            if len(recent) >= 3:
                 # Check similarity of recent submissions
-                recent = self.spam_tracker[phone_number][-3:]
                 similar_count = 0
                 for i in range(len(recent)):
                     for j in range(i + 1, len(recent)):
@@ -431,6 +529,10 @@ class HelplineProcessor:
                 if similar_count >= 2:
                     return True, "Bulk submission"
 
+        # Check for the same message arriving from many different numbers
+        if self.duplicate_index.is_campaign(text, phone_number):
+            return True, "Campaign submission"
+
         return False, None
 
     def check_up_location(self, location: str) -> bool:
@@ -438,19 +540,8 @@ class HelplineProcessor:
         if not location:
             return False
 
-        location_lower = location.lower()
-
-        # Check PIN code
-        pin_match = re.search(r"\b(\d{6})\b", location)
-        if pin_match:
-            pin_int = int(pin_match.group(1))
-            for start, end in self.up_pin_ranges:
-                if start <= pin_int <= end:
-                    return True
-            return False  # PIN code outside UP
-
-        # Check known UP locations
-        return any(up_loc in location_lower for up_loc in self.up_locations)
+        # A PIN decides it; otherwise the location must name a UP district or locality
+        return self.gazetteer.is_up(location)
 
     def determine_completeness(
         self, extracted_data: Dict
@@ -483,6 +574,13 @@ class HelplineProcessor:
 
     def process(self, text: str) -> Optional[Grievance]:
         """Main processing function. Returns Grievance object if not spam, else None."""
+        return self.finish(self.analyze(text))
+
+    def analyze(self, text: str) -> Dict:
+        """
+        Extraction plus every check that does not depend on earlier
+        submissions. Safe to run in any process and in any order.
+        """
         extracted_data = {
             "name": self.extract_name(text, "english"),
             "number": self.extract_phone_number(text),
@@ -502,18 +600,36 @@ class HelplineProcessor:
         if (
             extracted_data["location"]
             and extracted_data["location"].lower() not in self.up_locations
-            and not re.search(r"pin", extracted_data["location"], re.IGNORECASE)
+            and not PIN_WORD_PATTERN.search(extracted_data["location"])
         ):
             if not extracted_data["name"]:
                 extracted_data["name"] = extracted_data["location"]
                 extracted_data["location"] = ""
-        # Check spam
-        is_spam, spam_reason = self.detect_spam(text, extracted_data["number"])
-        if not is_spam and extracted_data["location"]:
+        is_spam, spam_reason = self.detect_content_spam(text)
+        out_of_up = False
+        if extracted_data["location"]:
             location_check = self.check_up_location(extracted_data["location"])
-            if not location_check and len(extracted_data["location"]) > 5:
-                is_spam = True
-                spam_reason = "Out of UP location"
+            out_of_up = not location_check and len(extracted_data["location"]) > 5
+        return {
+            "text": text,
+            "extracted": extracted_data,
+            "spam_reason": spam_reason if is_spam else None,
+            "out_of_up": out_of_up,
+        }
+
+    def finish(self, analysis: Dict) -> Optional[Grievance]:
+        """Run the stateful spam checks on an analyze() result and build the Grievance."""
+        extracted_data = analysis["extracted"]
+        # Check spam
+        is_spam = analysis["spam_reason"] is not None
+        spam_reason = analysis["spam_reason"]
+        if not is_spam:
+            is_spam, spam_reason = self.detect_repeat_spam(
+                analysis["text"], extracted_data["number"]
+            )
+        if not is_spam and analysis["out_of_up"]:
+            is_spam = True
+            spam_reason = "Out of UP location"
         if is_spam:
             return None
         # Parse date_time from extracted_data['time']
@@ -534,6 +650,50 @@ class HelplineProcessor:
             date_time=date_time,
         )
 
+    def iter_process(
+        self, texts: Iterable[str], workers: Optional[int] = None, chunksize: int = 16
+    ) -> Iterator[Optional[Grievance]]:
+        """
+        process() over many transcripts, yielding results in input order.
+
+        Extraction and the text-only spam checks run in a pool of `workers`
+        processes (default: one per CPU), each with its own processor. The
+        bulk and campaign checks run here, in input order, against this
+        processor's tracker and index, so they see every submission exactly
+        as process() called in a loop would.
+
+        texts is read lazily: at most two chunks of `chunksize` per worker
+        are in flight, so an unbounded stream is processed in bounded memory.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            for text in texts:
+                yield self.process(text)
+            return
+        texts = iter(texts)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.nlp_backend,),
+        ) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = list(itertools.islice(texts, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_analyze_chunk_in_worker, chunk))
+                if not pending:
+                    return
+                for analysis in pending.popleft().result():
+                    yield self.finish(analysis)
+
+    def process_many(
+        self, texts: Iterable[str], workers: Optional[int] = None, chunksize: int = 16
+    ) -> List[Optional[Grievance]]:
+        """process() over many transcripts in a process pool; results in input order."""
+        return list(self.iter_process(texts, workers=workers, chunksize=chunksize))
+
     def process_grievance_object(self, grievance: "Grievance") -> Optional["Grievance"]:
         """Process an already-populated Grievance object. Return the object if not spam, else None."""
         # Combine all fields into a single text for spam detection
@@ -549,3 +709,22 @@ class HelplineProcessor:
         if is_spam:
             return None
         return grievance
+
+
+# ------------- Worker processes ----------------
+_worker_processor = None
+
+
+def _init_worker(nlp_backend):
+    # Built once per worker. Workers only run analyze(), so they get a private
+    # tracker and index instead of loading the shared ones.
+    global _worker_processor
+    _worker_processor = HelplineProcessor(
+        nlp_backend=nlp_backend,
+        spam_tracker=SubmissionTracker(),
+        duplicate_index=NearDuplicateIndex(),
+    )
+
+
+def _analyze_chunk_in_worker(texts):
+    return [_worker_processor.analyze(text) for text in texts]
@@ -0,0 +1,187 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# ------------- CONFIGURATION ----------------
+TRACKER_FILE = "data/spam_tracker.json"
+TRACKER_WINDOW = 3  # recent submissions kept per phone number
+TRACKER_TTL = 7 * 24 * 3600  # seconds before a number's history is forgotten
+TRACKER_MAX_ENTRIES = 300000  # submissions kept across all numbers
+TRACKER_SNAPSHOT_EVERY = 100  # records between automatic snapshots
+
+
+class SubmissionTracker:
+    """
+    Fixed-memory record of recent submissions per phone number.
+
+    Each number keeps a ring of its last `window` (timestamp, fingerprint)
+    pairs. Numbers are kept in least-recently-submitted order, so expiring
+    those idle for longer than `ttl` and evicting the oldest once more than
+    `max_entries` submissions are held both happen from the front in
+    amortized O(1). With a snapshot path the tracker is reloaded on
+    construction and written back every `snapshot_every` records, so the
+    bulk-submission check survives a restart. Those periodic snapshots are
+    written on a background thread, so record() never waits on the file;
+    close() writes whatever is still unsaved (the shared tracker also does
+    so at exit).
+    """
+
+    def __init__(
+        self,
+        window=TRACKER_WINDOW,
+        ttl=TRACKER_TTL,
+        max_entries=TRACKER_MAX_ENTRIES,
+        snapshot_path=None,
+        snapshot_every=TRACKER_SNAPSHOT_EVERY,
+        clock=time.time,
+    ):
+        self.window = window
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.clock = clock
+        self._numbers = OrderedDict()  # phone -> deque of (timestamp, fingerprint)
+        self._entries = 0
+        self._unsaved = 0
+        self._saving = False  # a background snapshot is running
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the snapshot file at a time
+        if snapshot_path:
+            self.reload()
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, phone_number):
+        return phone_number in self._numbers
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def record(self, phone_number, fingerprint):
+        """Add a submission and return the number's recent fingerprints, oldest first."""
+        with self._lock:
+            now = self.clock()
+            ring = self._numbers.pop(phone_number, None)
+            if ring is None:
+                ring = deque(maxlen=self.window)
+            # Drop this number's submissions that have aged out
+            while ring and now - ring[0][0] > self.ttl:
+                ring.popleft()
+                self._entries -= 1
+            if len(ring) < self.window:
+                self._entries += 1
+            ring.append((now, fingerprint))
+            self._numbers[phone_number] = ring
+            self._evict(now)
+            recent = [fp for _, fp in ring]
+            self._unsaved += 1
+            save = (
+                self.snapshot_path
+                and self._unsaved >= self.snapshot_every
+                and not self._saving
+            )
+            if save:
+                self._saving = True
+        if save:
+            threading.Thread(
+                target=self._background_snapshot, name="spam-tracker-snapshot", daemon=True
+            ).start()
+        return recent
+
+    def recent(self, phone_number):
+        """Recent fingerprints for a number within the TTL, oldest first."""
+        with self._lock:
+            now = self.clock()
+            ring = self._numbers.get(phone_number, ())
+            return [fp for ts, fp in ring if now - ts <= self.ttl]
+
+    def _evict(self, now):
+        # Least recently submitted numbers come first
+        while self._numbers:
+            phone_number, ring = next(iter(self._numbers.items()))
+            if now - ring[-1][0] <= self.ttl and self._entries <= self.max_entries:
+                break
+            self._numbers.popitem(last=False)
+            self._entries -= len(ring)
+
+    def expire(self):
+        """Forget numbers idle for longer than the TTL."""
+        with self._lock:
+            self._evict(self.clock())
+
+    # --------- Persistence ---------------
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        except OSError as e:
+            print(f"Could not save spam tracker snapshot: {e}")
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def close(self):
+        """Snapshot records made since the last snapshot. The tracker stays usable."""
+        with self._lock:
+            unsaved = self.snapshot_path and self._unsaved
+        if unsaved:
+            self.snapshot()
+
+    def snapshot(self, file_path=None):
+        """Write the tracker to a JSON file, atomically."""
+        file_path = file_path or self.snapshot_path
+        with self._lock:
+            # Copy only; encoding and writing happen outside the lock
+            numbers = [(phone_number, list(ring)) for phone_number, ring in self._numbers.items()]
+            self._unsaved = 0
+        data = {
+            "window": self.window,
+            "numbers": [
+                [phone_number, [list(item) for item in ring]] for phone_number, ring in numbers
+            ],
+        }
+        with self._save_lock:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, file_path)
+
+    def reload(self, file_path=None):
+        """Replace the tracked state with a snapshot, dropping expired entries."""
+        file_path = file_path or self.snapshot_path
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        with self._lock:
+            self._numbers = OrderedDict()
+            self._entries = 0
+            for phone_number, items in data.get("numbers", []):
+                ring = deque(((ts, fp) for ts, fp in items), maxlen=self.window)
+                if ring:
+                    self._numbers[phone_number] = ring
+                    self._entries += len(ring)
+            self._evict(self.clock())
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_submission_tracker():
+    """Process-wide tracker persisted to data/spam_tracker.json under the working directory."""
+    snapshot_path = f"{os.getcwd()}/{TRACKER_FILE}"
+    with _trackers_lock:
+        tracker = _trackers.get(snapshot_path)
+        if tracker is None:
+            tracker = SubmissionTracker(snapshot_path=snapshot_path)
+            atexit.register(tracker.close)
+            _trackers[snapshot_path] = tracker
+        return tracker
@@ -1,3 +1,4 @@
+from components.admission import get_admission_controller
 from components.input import GrievanceAgent
 from components.models import CaseRecord, Grievance
 from components.gui import gui
@@ -23,19 +24,31 @@ def main():
         )
         print("Done")
 
-        processor = HelplineProcessor()
-        result = processor.process_grievance_object(grievance)
+        # Admission control: shed floods before any processing
+        admission = get_admission_controller()
+        with admission.admission(
+            grievance.caller_phone_no, grievance.location
+        ) as decision:
+            if not decision.admitted:
+                print(f"[SYSTEM] Submission shed: {decision.reason} {admission.stats()}")
+                return
 
-        print("Done")
+            processor = HelplineProcessor()
+            result = processor.process_grievance_object(grievance)
+            # Keep the repeat-caller history for the next run
+            processor.spam_tracker.close()
 
-        if result:
-            print(result)
-            # Thread mapping
-            subredditting(result)
+            print("Done")
 
-            # Scoring
-            scoring()
+            if result:
+                print(result)
+                # Thread mapping
+                subredditting(result)
 
+                # Scoring
+                scoring()
+
+        if result:
             # Deparment go go
             gui()
 
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writing process per cache directory
+    fcntl = None
+
+# ------------- CONFIGURATION ----------------
+EMBEDDING_CACHE_DIR = "data/embeddings"
+MEMORY_ENTRIES = 4096  # vectors kept in the in-memory LRU
+INITIAL_ROWS = 1024  # on-disk matrix grows by doubling from here
+
+_KEY = re.compile(r"[0-9a-f]{40}")
+
+
+def text_key(text):
+    """Content hash used as the cache key for a piece of text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed cache of sentence embeddings.
+
+    Hot vectors live in an in-memory LRU. Every vector is also written once to
+    an on-disk float32 matrix (memory-mapped) with a parallel key file, so a
+    text is only ever encoded by the model once across restarts.
+
+    Layout under <directory>/<model_name>/:
+        vectors.f32  - row-major float32 matrix, capacity rows x dim
+        keys.txt     - one hex key per line; line i names row i
+        meta.json    - {"dim": ...}
+        lock         - flock'ed while appending
+
+    Several processes may share a directory. Appends hold the lock and take
+    their rows after every key already in keys.txt, rereading what other
+    processes appended since; a key only counts once its line is complete
+    and its row lies inside vectors.f32.
+    """
+
+    def __init__(self, model_name, directory=None, memory_entries=MEMORY_ENTRIES):
+        directory = directory or f"{os.getcwd()}/{EMBEDDING_CACHE_DIR}"
+        self.path = os.path.join(directory, model_name.replace("/", "_"))
+        self.memory_entries = memory_entries
+
+        self._lock = threading.RLock()
+        self._lru = OrderedDict()
+        self._rows = {}  # key -> row in the on-disk matrix
+        self._key_lines = 0  # complete lines read from keys.txt
+        self._keys_offset = 0  # bytes of keys.txt read so far
+        self._matrix = None
+        self._dim = None
+
+        self._open()
+
+    # --------- Disk ---------------
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _keys_path(self):
+        return os.path.join(self.path, "keys.txt")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _lock_path(self):
+        return os.path.join(self.path, "lock")
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock against other processes appending to this cache."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield  # released when the file is closed
+
+    def _open(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r") as f:
+            self._dim = json.load(f)["dim"]
+        self._refresh()
+
+    def _refresh(self):
+        """Pick up keys appended since the last read, by any process, and remap."""
+        capacity = self._capacity_on_disk()
+        if self._matrix is None or self._matrix.shape[0] != capacity:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._map(capacity)
+        if not os.path.exists(self._keys_path):
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # A partial last line (a crashed append) is not a key yet
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            key = line.strip().decode("ascii", "replace")
+            # Line i names row i; rows past the end of the matrix were never written
+            if _KEY.fullmatch(key) and self._key_lines < capacity:
+                self._rows.setdefault(key, self._key_lines)
+            self._key_lines += 1
+        self._keys_offset += end
+
+    def _capacity_on_disk(self):
+        if not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (4 * self._dim)
+
+    def _map(self, capacity):
+        if capacity == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim)
+        )
+
+    def _ensure_capacity(self, rows):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(INITIAL_ROWS, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self._dim * 4)
+        self._map(new_capacity)
+
+    def _write(self, items):
+        """Append (key, vector) pairs to the on-disk matrix and key file."""
+        with self._file_lock():
+            if self._dim is None:
+                if os.path.exists(self._meta_path):
+                    # Created by another process since we opened
+                    self._open()
+                else:
+                    self._dim = len(items[0][1])
+                    with open(self._meta_path, "w") as f:
+                        json.dump({"dim": self._dim}, f)
+            self._refresh()
+            items = [(key, vector) for key, vector in items if key not in self._rows]
+            if not items:
+                return
+
+            # A partial line left by a crashed append is ended and skipped
+            partial = (
+                os.path.exists(self._keys_path)
+                and os.path.getsize(self._keys_path) > self._keys_offset
+            )
+            start = self._key_lines + partial
+            self._ensure_capacity(start + len(items))
+            for offset, (_, vector) in enumerate(items):
+                self._matrix[start + offset] = vector
+            self._matrix.flush()
+            # Keys are written after the vectors so a listed key always has its row.
+            with open(self._keys_path, "ab") as f:
+                if partial:
+                    f.write(b"\n")
+                f.write("".join(f"{key}\n" for key, _ in items).encode("ascii"))
+            self._refresh()
+
+    # --------- Memory ---------------
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_entries:
+            self._lru.popitem(last=False)
+
+    # --------- Public API ---------------
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, text):
+        return text_key(text) in self._rows
+
+    def get(self, text):
+        """Cached embedding for text, or None."""
+        key = text_key(text)
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                return vector
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            vector = np.array(self._matrix[row])
+            self._remember(key, vector)
+            return vector
+
+    def put(self, text, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        with self._lock:
+            fresh = []
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                if key not in self._rows:
+                    fresh.append((key, vector))
+                    self._rows[key] = None  # reserve against duplicates in this batch
+                self._remember(key, vector)
+            for key, _ in fresh:
+                del self._rows[key]
+            if fresh:
+                self._write(fresh)
+
+    def get_or_compute(self, text, encode):
+        """Embedding for one text; encode(text) is only called on a miss."""
+        return self.get_or_compute_many([text], lambda batch: [encode(batch[0])])[0]
+
+    def get_or_compute_many(self, texts, encode):
+        """
+        Embeddings for several texts, in order.
+
+        encode(list_of_texts) is called once with just the distinct misses.
+        """
+        results = [self.get(text) for text in texts]
+        missing = list(
+            dict.fromkeys(text for text, vec in zip(texts, results) if vec is None)
+        )
+        if missing:
+            encoded = encode(missing)
+            self.put_many(missing, encoded)
+            fresh = dict(zip(missing, encoded))
+            results = [
+                np.asarray(fresh[text], dtype=np.float32) if vec is None else vec
+                for text, vec in zip(texts, results)
+            ]
+        return results
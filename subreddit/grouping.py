@@ -0,0 +1,213 @@
+from bisect import bisect_right
+
+import numpy as np
+import scipy.sparse as sp
+
+from components.case_store import location_key, parse_timestamp
+from subreddit.lexical import LexicalModel
+
+SECONDS_PER_DAY = 86400.0
+INITIAL_ROWS = 64
+
+
+def grow(array, size):
+    """Copy of array with its first axis enlarged to size (new rows uninitialized)."""
+    grown = np.empty((size,) + array.shape[1:], dtype=array.dtype)
+    grown[: array.shape[0]] = array
+    return grown
+
+
+def normalize_rows(matrix):
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocationBucket:
+    """
+    Cases of one location: ids, unit-norm embeddings and term counts by row,
+    plus the rows ordered by pre-parsed problem_start timestamp for
+    bisecting. Term counts are the arrays of one CSR matrix, grown by
+    doubling like the embedding matrix, so candidate rows are one slice.
+    """
+
+    def __init__(self, dim, n_features):
+        self.case_nos = []
+        self.matrix = np.empty((INITIAL_ROWS, dim), dtype=np.float32)
+        self.n_features = n_features
+        self._indptr = np.zeros(INITIAL_ROWS + 1, dtype=np.int64)
+        self._indices = np.empty(INITIAL_ROWS, dtype=np.int32)
+        self._data = np.empty(INITIAL_ROWS, dtype=np.float64)
+        self._term_counts = None  # CSR view of the arrays, rebuilt after changes
+        self.sorted_starts = []
+        self.sorted_rows = []
+
+    def __len__(self):
+        return len(self.case_nos)
+
+    @property
+    def term_counts(self):
+        """(cases x features) CSR term counts; row i belongs to case_nos[i]."""
+        if self._term_counts is None:
+            n = len(self.case_nos)
+            nnz = self._indptr[n]
+            self._term_counts = sp.csr_matrix(
+                (self._data[:nnz], self._indices[:nnz], self._indptr[: n + 1]),
+                shape=(n, self.n_features),
+            )
+        return self._term_counts
+
+    def add(self, case_no, term_counts, start, unit_vector):
+        n = len(self.case_nos)
+        if n == self.matrix.shape[0]:
+            self.matrix = grow(self.matrix, 2 * n)
+            self._indptr = grow(self._indptr, 2 * n + 1)
+        nnz = self._indptr[n]
+        end = nnz + term_counts.nnz
+        if end > self._data.shape[0]:
+            size = max(end, 2 * self._data.shape[0])
+            self._indices = grow(self._indices, size)
+            self._data = grow(self._data, size)
+        self._indices[nnz:end] = term_counts.indices
+        self._data[nnz:end] = term_counts.data
+        self._indptr[n + 1] = end
+        self.case_nos.append(case_no)
+        self.matrix[n] = unit_vector
+        self._term_counts = None
+
+        pos = bisect_right(self.sorted_starts, start)
+        self.sorted_starts.insert(pos, start)
+        self.sorted_rows.insert(pos, n)
+
+    def remove(self, case_nos):
+        """Drop the rows of the given cases; returns their term counts, or None."""
+        keep = [row for row, case_no in enumerate(self.case_nos) if case_no not in case_nos]
+        if len(keep) == len(self.case_nos):
+            return None
+        dropped = [row for row, case_no in enumerate(self.case_nos) if case_no in case_nos]
+        removed = self.term_counts[dropped]
+        kept_counts = self.term_counts[keep]
+        new_row = {row: i for i, row in enumerate(keep)}
+        self.matrix[: len(keep)] = self.matrix[keep]
+        self.case_nos = [self.case_nos[row] for row in keep]
+        self._indptr[: len(keep) + 1] = kept_counts.indptr
+        self._indices[: kept_counts.nnz] = kept_counts.indices
+        self._data[: kept_counts.nnz] = kept_counts.data
+        self._term_counts = None
+        kept = [
+            (start, new_row[row])
+            for start, row in zip(self.sorted_starts, self.sorted_rows)
+            if row in new_row
+        ]
+        self.sorted_starts = [start for start, _ in kept]
+        self.sorted_rows = [row for _, row in kept]
+        return removed
+
+    def window(self, after, until):
+        """Rows whose start timestamp is in (after, until], in start order."""
+        lo = bisect_right(self.sorted_starts, after)
+        hi = bisect_right(self.sorted_starts, until)
+        return np.array(self.sorted_rows[lo:hi], dtype=np.intp)
+
+
+class GroupingEngine:
+    """
+    In-memory index for thread grouping.
+
+    Cases are bucketed by normalized location and, inside a bucket, sorted by
+    problem_start, so candidates for a grievance are a bisect slice: O(log n + k)
+    and never touching other districts or weeks. Each bucket keeps a
+    normalized embedding matrix, so the semantic half of the similarity for
+    every candidate is one matrix-vector product. The lexical half uses a
+    corpus-wide hashed TF-IDF model, so it is one sparse product as well.
+    """
+
+    def __init__(self, date_window, tfidf_weight, llm_weight, threshold):
+        self.date_window_days = date_window.days
+        self.tfidf_weight = tfidf_weight
+        self.llm_weight = llm_weight
+        self.threshold = threshold
+        self.buckets = {}
+        self.case_nos = set()
+        self.lexical = LexicalModel()
+
+    def __len__(self):
+        return len(self.case_nos)
+
+    def add_case(self, case, embedding):
+        """Index a case dict with the embedding of its case_detail."""
+        self.add_cases([case], [embedding])
+
+    def add_cases(self, cases, embeddings):
+        indexed = []
+        for case, embedding in zip(cases, embeddings):
+            if case["case_no"] in self.case_nos:
+                continue
+            start = parse_timestamp(case["problem_start"])
+            if start is None:
+                continue
+            indexed.append((case, start, embedding))
+            self.case_nos.add(case["case_no"])
+        if not indexed:
+            return
+
+        counts = self.lexical.term_counts([case["case_detail"] for case, _, _ in indexed])
+        self.lexical.add_documents(counts)
+        for row, (case, start, embedding) in enumerate(indexed):
+            unit = normalize_rows(embedding)[0]
+            key = location_key(case["location"])
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = LocationBucket(
+                    unit.shape[0], self.lexical.vectorizer.n_features
+                )
+            bucket.add(case["case_no"], counts[row], start.timestamp(), unit)
+
+    def remove_cases(self, case_nos):
+        """Drop cases from the index, e.g. when writing them to the store failed."""
+        case_nos = self.case_nos.intersection(case_nos)
+        if not case_nos:
+            return
+        removed = []
+        for key, bucket in list(self.buckets.items()):
+            counts = bucket.remove(case_nos)
+            if counts is not None:
+                removed.append(counts)
+            if len(bucket) == 0:
+                del self.buckets[key]
+        if removed:
+            self.lexical.remove_documents(sp.vstack(removed, format="csr"))
+        self.case_nos -= case_nos
+
+    def best_match(self, location, when, description, embedding):
+        """
+        Return (case_no, score) of the most similar case at the location within
+        the date window, or (None, -1) if nothing clears the threshold.
+        """
+        bucket = self.buckets.get(location_key(location))
+        if bucket is None or len(bucket) == 0:
+            return None, -1
+
+        # abs((when - case_date).days) <= window compares whole (floored) days,
+        # which holds exactly for case_date in (when - window - 1d, when + window].
+        t = when.timestamp()
+        rows = bucket.window(
+            t - (self.date_window_days + 1) * SECONDS_PER_DAY,
+            t + self.date_window_days * SECONDS_PER_DAY,
+        )
+        if rows.size == 0:
+            return None, -1
+
+        llm_scores = bucket.matrix[rows] @ normalize_rows(embedding)[0]
+        tfidf_scores = self.lexical.similarities(
+            self.lexical.term_counts([description]), bucket.term_counts[rows]
+        )
+
+        scores = (self.tfidf_weight * tfidf_scores + self.llm_weight * llm_scores) / (
+            self.tfidf_weight + self.llm_weight
+        )
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None, -1
+        return bucket.case_nos[rows[best]], float(scores[best])
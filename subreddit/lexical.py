@@ -0,0 +1,57 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+N_FEATURES = 2**18
+
+
+class LexicalModel:
+    """
+    Corpus-wide TF-IDF for the lexical half of thread similarity.
+
+    Terms are hashed into a fixed feature space (no vocabulary to refit) and
+    document frequencies are updated as cases arrive, so IDF reflects the
+    whole archive rather than a single pair of texts. Case texts are turned
+    into term-count rows once; IDF weighting and normalization are applied at
+    comparison time so older rows pick up the current statistics.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        # Same tokenization as TfidfVectorizer's defaults
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None
+        )
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+    def term_counts(self, texts):
+        """Raw term-count rows (CSR) for a list of texts."""
+        return self.vectorizer.transform(texts).tocsr()
+
+    def add_documents(self, counts):
+        """Fold term-count rows of newly indexed case texts into the statistics."""
+        np.add.at(self.df, counts.indices, 1)
+        self.n_docs += counts.shape[0]
+
+    def remove_documents(self, counts):
+        """Take term-count rows of cases dropped from the index back out."""
+        np.subtract.at(self.df, counts.indices, 1)
+        self.n_docs -= counts.shape[0]
+
+    def idf(self, features):
+        # Smoothed IDF, as TfidfVectorizer(smooth_idf=True), for the given columns
+        return np.log((1.0 + self.n_docs) / (1.0 + self.df[features])) + 1.0
+
+    def weigh(self, counts):
+        """L2-normalized TF-IDF rows for term-count rows, in O(nnz)."""
+        weighted = sp.csr_matrix(counts, dtype=np.float64, copy=True)
+        weighted.data *= self.idf(weighted.indices)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.diags(1.0 / norms) @ weighted
+
+    def similarities(self, query_counts, candidate_counts):
+        """Cosine similarity of one query row against each candidate row."""
+        query = self.weigh(query_counts)
+        candidates = self.weigh(candidate_counts)
+        return np.asarray((candidates @ query.T).todense()).ravel()
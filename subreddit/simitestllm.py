@@ -1,25 +1,24 @@
 # this is the one we should probs use, it has sentiment analysis also since problem statement mentioned it
+import time
+
+_import_started = time.perf_counter()
+
 import json
 import os
 import uuid
 import shutil
+import threading
 import numpy as np
 
 # import sniffio
-from datetime import datetime, timedelta
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# from ibm_watsonx_ai.foundation_models import Model
-from ibm_watsonx_ai.foundation_models import ModelInference as Model
-from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
-from ibm_watsonx_ai.foundation_models.utils.enums import ModelTypes
-from ibm_watsonx_ai import *  # IAMTokenManager
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
-from sentence_transformers import SentenceTransformer
-import spacy
-from components.models import CaseRecord
-import os
+from datetime import timedelta
+
+# Watsonx, SentenceTransformer and the grouping index (sklearn/scipy) are
+# imported on first use; see get_watsonx_model(), get_embedder() and
+# get_grouping_engine().
+from components.models import CaseRecord, Grievance
+from components.case_store import get_case_store, parse_timestamp
+from subreddit.embedding_cache import EmbeddingCache
 
 # path = os.getcwd()
 
@@ -31,23 +30,98 @@ SIMILARITY_THRESHOLD = 0.2
 DATE_WINDOW = timedelta(days=2)
 LLM_WEIGHT = 0.4
 TFIDF_WEIGHT = 0.6
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 64
 
 # RAW_INPUT = r"C:\Users\venka\Downloads\mosaic\experimentaldata\sample_grievances.json"
 # OUTPUT_DIR = r"C:\Users\venka\Downloads\mosaic\sampleoutputs"
 # OUTPUT_FILE = "grouped_threads_watsonx.json"
 
-# ------------- IBM Watsonx Setup ----------------
-# token_manager = IAMTokenManager(api_key=IBM_API_KEY, url=f"https://iam.cloud.ibm.com/identity/token")
-token_manager = IAMAuthenticator(IBM_API_KEY)
-model = Model(
-    model_id=ModelTypes.GRANITE_8B_CODE_INSTRUCT,  # You can also use granite or mistral based on your access
-    params={GenParams.DECODING_METHOD: "greedy", GenParams.MAX_NEW_TOKENS: 10},
-    credentials={
-        "url": f"https://{IBM_REGION}.ml.cloud.ibm.com",
-        "apikey": IBM_API_KEY,
-    },
-    project_id=IBM_PROJECT_ID,
-)
+# ------------- Lazy Clients ----------------
+# Process-wide singletons, created on first use so importing this module is
+# cheap and works offline. STARTUP_TIMINGS records how long each took;
+# report_startup() prints each timing once, after warm_up() or the first
+# grievance has paid for it.
+STARTUP_TIMINGS = {}
+_reported = set()
+_clients_lock = threading.Lock()
+_grouping_lock = threading.Lock()  # separate: building the engine loads the embedder
+model = None
+embedder = None
+
+
+def _timed(name, load):
+    started = time.perf_counter()
+    value = load()
+    STARTUP_TIMINGS[name] = time.perf_counter() - started
+    return value
+
+
+def _load_watsonx_model():
+    # from ibm_watsonx_ai.foundation_models import Model
+    from ibm_watsonx_ai.foundation_models import ModelInference as Model
+    from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
+    from ibm_watsonx_ai.foundation_models.utils.enums import ModelTypes
+
+    # token_manager = IAMTokenManager(api_key=IBM_API_KEY, url=f"https://iam.cloud.ibm.com/identity/token")
+    return Model(
+        model_id=ModelTypes.GRANITE_8B_CODE_INSTRUCT,  # You can also use granite or mistral based on your access
+        params={GenParams.DECODING_METHOD: "greedy", GenParams.MAX_NEW_TOKENS: 10},
+        credentials={
+            "url": f"https://{IBM_REGION}.ml.cloud.ibm.com",
+            "apikey": IBM_API_KEY,
+        },
+        project_id=IBM_PROJECT_ID,
+    )
+
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def get_watsonx_model():
+    """Shared Watsonx ModelInference client, created on first call."""
+    global model
+    if model is None:
+        with _clients_lock:
+            if model is None:
+                model = _timed("watsonx_model", _load_watsonx_model)
+    return model
+
+
+def get_embedder():
+    """Shared SentenceTransformer, loaded on first call."""
+    global embedder
+    if embedder is None:
+        with _clients_lock:
+            if embedder is None:
+                embedder = _timed("embedder", _load_embedder)
+    return embedder
+
+
+def warm_up(watsonx=True, embeddings=True, grouping=True):
+    """
+    Create the clients ahead of the first grievance, e.g. when a service
+    starts. Returns STARTUP_TIMINGS.
+    """
+    if watsonx:
+        get_watsonx_model()
+    if embeddings:
+        get_embedder()
+    if grouping:
+        get_grouping_engine()
+    report_startup()
+    return STARTUP_TIMINGS
+
+
+def report_startup():
+    """Print the startup timings not reported yet."""
+    for name, seconds in list(STARTUP_TIMINGS.items()):
+        if name not in _reported:
+            _reported.add(name)
+            print(f"[STARTUP] {name}: {seconds * 1000:.0f} ms")
 
 # embed_model = Model(
 #     model_id="embedding-001",  # Available IBM Embedding model
@@ -69,11 +143,50 @@ def move_file_to_directory(file_path, target_dir):
 # def get_watsonx_embedding(text):
 #     response = embed_model.generate(texts=[text])
 #     return np.array(response['results'][0]['embedding'])
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+embedding_cache = None
+grouping_engine = None
+
+
+def get_embedding_cache():
+    global embedding_cache
+    if embedding_cache is None:
+        with _clients_lock:
+            if embedding_cache is None:
+                embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
+    return embedding_cache
+
+
+def encode(texts, **kwargs):
+    # The embedder is only loaded when the cache actually misses
+    return get_embedder().encode(texts, **kwargs)
 
 
 def get_local_embedding(text):
-    return embedder.encode(text)
+    # Texts are encoded once; case_detail of a new case is the grievance
+    # description, so its embedding is already cached when the case is created.
+    return get_embedding_cache().get_or_compute(text, encode)
+
+
+def get_grouping_engine():
+    """Grouping index over the case store, built once per process."""
+    global grouping_engine
+    if grouping_engine is None:
+        with _grouping_lock:
+            if grouping_engine is None:
+                grouping_engine = _timed("grouping_engine", _build_grouping_engine)
+    return grouping_engine
+
+
+def _build_grouping_engine():
+    from subreddit.grouping import GroupingEngine
+
+    engine = GroupingEngine(DATE_WINDOW, TFIDF_WEIGHT, LLM_WEIGHT, SIMILARITY_THRESHOLD)
+    cases = get_case_store().cases()
+    embeddings = get_embedding_cache().get_or_compute_many(
+        [case["case_detail"] for case in cases], encode
+    )
+    engine.add_cases(cases, embeddings)
+    return engine
 
 
 def cosine_sim(vec1, vec2):
@@ -83,7 +196,7 @@ def cosine_sim(vec1, vec2):
 # ---------- Sentiment Analysis ----------------
 def get_sentiment(text):
     prompt = f'Classify the following grievance description as Positive, Neutral, or Negative:\n\n"{text}"\n\nSentiment:'
-    result = model.generate_text(prompt=prompt)
+    result = get_watsonx_model().generate_text(prompt=prompt)
     # print(type(result))
     sentiment = result.strip().lower()
     if "positive" in sentiment:
@@ -94,16 +207,93 @@ def get_sentiment(text):
         return "Neutral"
 
 
+def make_thread_entry(g):
+    return {
+        "caller_name": g.caller_name,
+        "caller_phone_no": g.caller_phone_no,
+        "description": g.description,
+        "location": g.location,
+        "date_time": g.date_time.isoformat(),
+    }
+
+
+def make_case(g, thread_entry):
+    return {
+        "case_no": str(uuid.uuid4()),
+        "case_category": "",
+        "case_detail": g.description,
+        "problem_start": g.date_time.isoformat(),
+        "location": g.location.lower(),
+        "priority": "",
+        "score": 0,
+        "status": "open",
+        "thread": [thread_entry],
+    }
+
+
+def load_grievances(file_path):
+    """Read a JSON list of grievance dicts, e.g. experimentaldata/sample_grievances.json."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return [Grievance.from_dict(g) for g in json.load(f)]
+
+
+def subredditting_batch(grievances, batch_size=EMBED_BATCH_SIZE):
+    """
+    Thread a list of grievances in one pass.
+
+    All descriptions are embedded with one batched encode call (cache misses
+    only), grievances may group with cases created earlier in the same batch,
+    and the store is written once at the end. If that write fails, the
+    batch's new cases are taken back out of the grouping engine. Returns the
+    case_no each grievance was assigned to, in order.
+    """
+    store = get_case_store()
+    engine = get_grouping_engine()
+
+    for g in grievances:
+        g.date_time = parse_timestamp(g.date_time)
+
+    embeddings = get_embedding_cache().get_or_compute_many(
+        [g.description for g in grievances],
+        lambda texts: encode(texts, batch_size=batch_size),
+    )
+
+    new_cases = {}  # case_no -> case dict created in this batch
+    thread_entries = []  # (case_no, entry) for cases already in the store
+    assigned = []
+    for g, embedding in zip(grievances, embeddings):
+        entry = make_thread_entry(g)
+        best_case_no, best_score = engine.best_match(
+            g.location, g.date_time, g.description, embedding
+        )
+        if best_case_no is None:
+            case = make_case(g, entry)
+            new_cases[case["case_no"]] = case
+            engine.add_case(case, embedding)
+            best_case_no = case["case_no"]
+        elif best_case_no in new_cases:
+            new_cases[best_case_no]["thread"].append(entry)
+        else:
+            thread_entries.append((best_case_no, entry))
+        assigned.append(best_case_no)
+
+    try:
+        store.add_batch(list(new_cases.values()), thread_entries)
+    except Exception:
+        engine.remove_cases(new_cases)
+        raise
+    report_startup()
+    return assigned
+
+
 def subredditting(g):
-    path = os.getcwd()
     # ---------- Load and Parse ----------------
-    with open(f"{path}/data/test.json", "r", encoding="utf-8") as f:
-        existing_cases = json.load(f)
+    store = get_case_store()
     # with open(RAW_INPUT, 'r', encoding='utf-8') as f:
     #     grievances = json.load(f)
 
     # for g in grievances:
-    g.date_time = datetime.fromisoformat(g.date_time)
+    g.date_time = parse_timestamp(g.date_time)
 
     # descriptions = [g['description'] for g in grievances]
     descriptions = g.description
@@ -121,64 +311,20 @@ def subredditting(g):
     print("Embeddings complete.")
 
     # ---------- Grouping Threads ---------------
-    visited = [False] * len(existing_cases)
-    threads = []
-    best_case_idx = -1
-    best_score = -1
-
-    for idx, case in enumerate(existing_cases):
-        if visited[idx]:
-            continue
-        if case["location"].lower() != g.location.lower():
-            continue
-        try:
-            case_date = datetime.fromisoformat(case["problem_start"])
-        except ValueError:
-            case_date = datetime.strptime(case["problem_start"], "%Y-%m-%d %H:%M:%S")
-
-        if abs((g.date_time - case_date).days) > DATE_WINDOW.days:
-            continue
-
-        tfidf = TfidfVectorizer()
-        texts = [case["case_detail"], descriptions]
-        tfidf_matrix = tfidf.fit_transform(texts)
-        tfidf_score = cosine_similarity(tfidf_matrix)[0][1]
-
-        case_embed = get_local_embedding(case["case_detail"])
-        llm_score = cosine_sim(embeddings, case_embed)
-
-        final_score = (TFIDF_WEIGHT * tfidf_score + LLM_WEIGHT * llm_score) / (
-            TFIDF_WEIGHT + LLM_WEIGHT
-        )
-
-        if final_score > best_score and final_score >= SIMILARITY_THRESHOLD:
-            best_score = final_score
-            best_case_idx = idx
+    engine = get_grouping_engine()
+    best_case_no, best_score = engine.best_match(
+        g.location, g.date_time, descriptions, embeddings[0]
+    )
 
-    new_thread_entry = {
-        "caller_name": g.caller_name,
-        "caller_phone_no": g.caller_phone_no,
-        "description": g.description,
-        "location": g.location,
-        "date_time": g.date_time.isoformat(),
-    }
-    if best_case_idx != -1:
-        existing_cases[best_case_idx]["thread"].append(new_thread_entry)
+    new_thread_entry = make_thread_entry(g)
+    if best_case_no is not None:
+        store.append_thread(best_case_no, new_thread_entry)
     else:
-        case = {
-            "case_no": str(uuid.uuid4()),
-            "case_category": "",
-            "case_detail": descriptions,
-            "problem_start": g.date_time.isoformat(),
-            "location": g.location.lower(),
-            "priority": "",
-            "score": 0,
-            "status": "open",
-            "thread": [new_thread_entry],
-        }
-        existing_cases.append(case)
-    with open(f"{path}/data/test.json", "w") as f:
-        json.dump(existing_cases, f)
+        case = make_case(g, new_thread_entry)
+        store.add_case(case)
+        engine.add_case(case, embeddings[0])
+    # First-call latencies, when the clients were not warmed up
+    report_startup()
 
         # base = grievances[i]
         # base_embed = embeddings[i]
@@ -235,3 +381,6 @@ def subredditting(g):
 
 # print(f"Thread grouping complete. Output saved to {OUTPUT_FILE}")
 # move_file_to_directory(OUTPUT_FILE, OUTPUT_DIR)
+
+
+STARTUP_TIMINGS["import"] = time.perf_counter() - _import_started
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# The components and subreddit packages are imported from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory with data/ copied in, so cwd-keyed singletons are fresh."""
+    data = tmp_path / "data"
+    data.mkdir()
+    for name in ("categories_data.json", "up_gazetteer.json"):
+        source = os.path.join(ROOT, "data", name)
+        if os.path.exists(source):
+            with open(source, "rb") as f:
+                (data / name).write_bytes(f.read())
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_case(case_no, location="Hazratganj, Lucknow", score=0, category="", thread=None):
+    return {
+        "case_no": case_no,
+        "case_category": category,
+        "case_detail": f"Problem {case_no}",
+        "problem_start": "2025-06-09 12:00:00",
+        "location": location,
+        "priority": "",
+        "score": score,
+        "status": "open",
+        "thread": thread or [],
+    }
+
+
+def make_entry(name="Caller", phone="9876543210", description="No water"):
+    return {
+        "caller_name": name,
+        "caller_phone_no": phone,
+        "description": description,
+        "location": "Lucknow",
+        "date_time": "2025-06-09 12:00:00",
+    }
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from components.admission import AdmissionController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_phone_burst_then_refill():
+    clock = Clock()
+    admission = AdmissionController(phone_burst=2, phone_refill=0.1, clock=clock)
+    assert admission.try_admit("+91 98765 43210").admitted
+    admission.release()
+    assert admission.try_admit("09876543210").admitted
+    admission.release()
+    assert admission.try_admit("9876543210") == (False, "Caller rate limit")
+    clock.now = 10
+    assert admission.try_admit("9876543210").admitted
+    admission.release()
+
+
+def test_places_in_one_district_share_a_bucket(workdir):
+    admission = AdmissionController(location_burst=2, location_refill=0, clock=Clock())
+    for location in ("Lucknow", "Gomti Nagar, Lucknow"):
+        with admission.admission(None, location) as decision:
+            assert decision.admitted
+    with admission.admission(None, "lucknow city") as decision:
+        assert decision == (False, "Location rate limit")
+    with admission.admission(None, "Agra") as decision:
+        assert decision.admitted
+
+
+def test_concurrency_limit_and_stats():
+    admission = AdmissionController(max_concurrent=2, clock=Clock())
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(lambda i: admission.try_admit(f"9{i:09d}"), range(8)))
+    assert sum(d.admitted for d in decisions) == 2
+    stats = admission.stats()
+    assert stats["in_flight"] == 2 and stats["shed_concurrency"] == 6
+    admission.release()
+    admission.release()
+    assert admission.stats()["in_flight"] == 0
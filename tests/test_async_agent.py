@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from components.async_agent import FileSource, SilentSpeaker, run_async_conversation
+from components.input import ExtractionSession, StubBackend
+from components.near_duplicate import NearDuplicateIndex
+from components.spam_filtering import HelplineProcessor
+from components.spam_tracker import SubmissionTracker
+
+ANSWERS = [
+    "There is no water supply in Hazratganj, Lucknow",
+    "My name is Ravi Kumar",
+    "9876543210",
+    "It has been like this for 3 days",
+]
+
+
+def answers_file(tmp_path, answers=ANSWERS):
+    path = tmp_path / "call.txt"
+    path.write_text("\n".join(answers) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def session_factory(update_delay=None):
+    """Sessions with an offline backend; update_delay(turn) can slow an update down."""
+    processor = HelplineProcessor(
+        spam_tracker=SubmissionTracker(), duplicate_index=NearDuplicateIndex()
+    )
+    overlaps = []
+
+    class Session(ExtractionSession):
+        active = 0
+        lock = threading.Lock()
+
+        def update(self, answer, question=None):
+            with Session.lock:
+                Session.active += 1
+                overlaps.append(Session.active > 1)
+            try:
+                if update_delay is not None:
+                    time.sleep(update_delay(self.stats["turns"]))
+                return super().update(answer, question)
+            finally:
+                with Session.lock:
+                    Session.active -= 1
+
+    backend = StubBackend(lambda prompt, text: json.dumps({}))
+    return (lambda: Session(processor, backend)), overlaps
+
+
+def test_call_from_a_file_produces_a_grievance(workdir):
+    factory, _ = session_factory()
+    grievance = run_async_conversation(
+        source=FileSource(answers_file(workdir)),
+        speaker=SilentSpeaker(),
+        session_factory=factory,
+    )
+    assert grievance is not None
+    assert grievance.caller_name == "Ravi Kumar"
+    assert grievance.caller_phone_no == "9876543210"
+
+
+class SlowSpeaker:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.speaking = False
+
+    def speak(self, text):
+        self.speaking = True
+        time.sleep(self.seconds)
+        self.speaking = False
+
+
+class WatchingSource(FileSource):
+    def __init__(self, path, speaker):
+        super().__init__(path)
+        self.speaker = speaker
+        self.heard_while_speaking = 0
+
+    def listen(self):
+        self.heard_while_speaking += self.speaker.speaking
+        return super().listen()
+
+
+def test_listening_waits_for_a_timed_out_speech(workdir):
+    speaker = SlowSpeaker(0.1)
+    source = WatchingSource(answers_file(workdir), speaker)
+    factory, _ = session_factory()
+    grievance = run_async_conversation(
+        source=source, speaker=speaker, session_factory=factory, timeouts={"speak": 0.02}
+    )
+    assert grievance is not None
+    assert source.heard_while_speaking == 0
+
+
+def test_extraction_timeout_asks_again_without_overlapping_updates(workdir, capsys):
+    # The second update (the caller's name) is slower than the extract timeout
+    factory, overlaps = session_factory(lambda turn: 0.3 if turn == 1 else 0)
+    answers = ANSWERS[:2] + ["My name is Ravi Kumar"] + ANSWERS[2:]
+    grievance = run_async_conversation(
+        source=FileSource(answers_file(workdir, answers)),
+        speaker=SilentSpeaker(),
+        session_factory=factory,
+        timeouts={"extract": 0.1},
+    )
+    output = capsys.readouterr().out
+    assert "Let me ask again" in output
+    assert "trouble connecting" not in output
+    assert grievance is not None and grievance.caller_name == "Ravi Kumar"
+    assert not any(overlaps)
+
+
+def test_file_source_treats_recognition_service_errors_as_nothing_heard(tmp_path, monkeypatch):
+    sr = pytest.importorskip("speech_recognition")
+    import wave
+
+    with wave.open(str(tmp_path / "01.wav"), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+
+    def unavailable(self, audio, **kwargs):
+        raise sr.RequestError("service unavailable")
+
+    monkeypatch.setattr(sr.Recognizer, "recognize_google", unavailable)
+    assert FileSource(str(tmp_path)).listen() is None
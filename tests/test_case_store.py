@@ -0,0 +1,138 @@
+import json
+import multiprocessing
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from components.case_store import JournaledCaseStore, SqliteCaseStore, fcntl
+
+from conftest import make_case, make_entry
+
+
+def journaled(workdir, **kwargs):
+    return JournaledCaseStore(
+        snapshot_path=str(workdir / "data" / "test.json"),
+        journal_path=str(workdir / "data" / "test.journal.jsonl"),
+        **kwargs,
+    )
+
+
+def test_journal_replays_into_a_fresh_store(workdir):
+    store = journaled(workdir)
+    store.add_case(make_case("A"))
+    store.append_thread("A", make_entry("First"))
+    store.update_case("A", {"score": 1.5})
+
+    reopened = journaled(workdir)
+    case = reopened.get("A")
+    assert [entry["caller_name"] for entry in case["thread"]] == ["First"]
+    assert case["score"] == 1.5
+
+
+def test_concurrent_appends_are_all_kept(workdir):
+    first, second = journaled(workdir), journaled(workdir)
+    first.add_case(make_case("A"))
+    second.cases()
+    # Both writers build their record against the same thread length
+    one = first._thread_record("A", make_entry("One"))
+    two = second._thread_record("A", make_entry("Two"))
+    first.write([one])
+    second.write([two])
+
+    names = [entry["caller_name"] for entry in journaled(workdir).get("A")["thread"]]
+    assert sorted(names) == ["One", "Two"]
+
+
+def test_replaying_a_compacted_journal_is_a_no_op(workdir):
+    store = journaled(workdir)
+    store.add_case(make_case("A"))
+    store.append_thread("A", make_entry("First"))
+    journal = (workdir / "data" / "test.journal.jsonl").read_bytes()
+
+    # Crash between writing the snapshot and truncating the journal
+    store.compact()
+    (workdir / "data" / "test.journal.jsonl").write_bytes(journal)
+
+    case = journaled(workdir).get("A")
+    assert len(case["thread"]) == 1
+
+
+def test_legacy_index_records_still_apply_once(workdir):
+    (workdir / "data" / "test.json").write_text(json.dumps([make_case("A")]))
+    record = {"op": "append_thread", "case_no": "A", "index": 0, "entry": make_entry()}
+    (workdir / "data" / "test.journal.jsonl").write_text(
+        json.dumps(record) + "\n" + json.dumps(record) + "\n"
+    )
+    assert len(journaled(workdir).get("A")["thread"]) == 1
+
+
+def test_compaction_keeps_every_case(workdir):
+    store = journaled(workdir, compact_every=5)
+    for i in range(12):
+        store.add_case(make_case(f"C{i}"))
+    assert json.loads((workdir / "data" / "test.json").read_text())
+    assert {case["case_no"] for case in journaled(workdir).cases()} == {
+        f"C{i}" for i in range(12)
+    }
+
+
+def _add_cases(workdir, prefix):
+    store = journaled(workdir, compact_every=3)
+    for i in range(40):
+        store.add_case(make_case(f"{prefix}{i}"))
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_compaction_keeps_cases_appended_by_other_processes(workdir):
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_add_cases, args=(workdir, prefix)) for prefix in "ABC"]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert len(journaled(workdir).cases()) == 120
+
+
+def test_returned_cases_are_copies(workdir):
+    store = journaled(workdir)
+    store.add_case(make_case("A", thread=[make_entry("First")]))
+    store.get("A")["thread"][0]["parsed_date"] = datetime.min
+    store.cases()[0]["score"] = 99
+
+    case = store.get("A")
+    assert "parsed_date" not in case["thread"][0] and case["score"] == 0
+    store.compact()
+    with open(store.snapshot_path) as f:
+        assert json.load(f)[0]["thread"][0] == case["thread"][0]
+
+
+def sqlite_store(workdir):
+    return SqliteCaseStore(db_path=str(workdir / "data" / "cases.db"))
+
+
+def test_sqlite_round_trip_and_candidates(workdir):
+    store = sqlite_store(workdir)
+    store.add_batch([make_case("A", thread=[make_entry("First")]), make_case("B")], [])
+    store.append_thread("A", make_entry("Second"))
+    store.update_case("B", {"score": 2.0, "note": "kept in extra"})
+
+    case = store.get("A")
+    assert [entry["caller_name"] for entry in case["thread"]] == ["First", "Second"]
+    assert store.get("B")["note"] == "kept in extra"
+    found = store.candidates(
+        "Lucknow", datetime(2025, 6, 1), datetime(2025, 6, 30)
+    )
+    assert {case["case_no"] for case in found} == {"A", "B"}
+
+
+def test_sqlite_loads_more_cases_than_bound_variables(workdir):
+    store = sqlite_store(workdir)
+    store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    cases = [make_case(f"C{i:05d}", thread=[make_entry()]) for i in range(2500)]
+    store.add_batch(cases, [])
+
+    assert len(store.cases()) == 2500
+    wanted = [f"C{i:05d}" for i in range(2499, -1, -2)]
+    assert [case["case_no"] for case in store.get_many(wanted)] == wanted
+    store.close()
@@ -0,0 +1,32 @@
+import json
+import os
+
+from components.categories import CategoryRegistry, category_id, get_category_registry
+
+CATEGORIES = [
+    {"name": "Energy, Power & Electricity", "semantic_weight": 8.0, "keywords": ["power"]},
+    {"name": "Water", "semantic_weight": 2.0, "keywords": ["water"]},
+]
+
+
+def test_ids_names_and_legacy_dicts_resolve_to_one_category():
+    registry = CategoryRegistry(CATEGORIES)
+    assert category_id("Energy, Power & Electricity") == "energy-power-electricity"
+    for value in ("energy-power-electricity", "Energy, Power & Electricity", dict(CATEGORIES[0])):
+        assert registry.resolve(value) is registry.categories[0]
+    assert registry.name("water") == "Water"
+    assert registry.id_of({"name": "Water", "keywords": []}) == "water"
+    assert registry.name("Unknown dept") == "Unknown dept"
+    assert registry.total_weight == 10.0
+
+
+def test_registry_is_shared_and_reloaded_when_the_file_changes(tmp_path):
+    path = tmp_path / "categories.json"
+    path.write_text(json.dumps(CATEGORIES))
+    first = get_category_registry(str(path))
+    assert get_category_registry(str(path)) is first
+
+    path.write_text(json.dumps(CATEGORIES[:1]))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert len(get_category_registry(str(path))) == 1
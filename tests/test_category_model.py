@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+
+from components import category_model
+from components.category_model import CategoryModel, EmbeddingCategoryModel, get_category_model
+
+CATEGORIES = [
+    {"name": "Water", "semantic_weight": 5.0, "keywords": ["water supply", "pipeline leak"]},
+    {"name": "Power", "semantic_weight": 5.0, "keywords": ["power cut", "electricity"]},
+    {"name": "Empty", "semantic_weight": 1.0, "keywords": []},
+]
+
+
+def test_tfidf_model_classifies_by_keyword_similarity():
+    best, scores = CategoryModel(CATEGORIES).classify(
+        ["No water supply since Monday", "Electricity gone, power cut", "nothing relevant"]
+    )
+    assert list(best[:2]) == [0, 1]
+    assert scores[2] == 0 and best[2] == 0  # no match: first category, score 0
+
+
+def test_model_is_saved_and_refitted_only_when_the_file_changes(workdir, monkeypatch):
+    path = workdir / "data" / "categories_data.json"
+    path.write_text(json.dumps(CATEGORIES))
+    monkeypatch.setattr(category_model, "_models", {})
+    first = get_category_model(str(path))
+    assert len(list((workdir / "data" / "models").glob("category_model-*.pkl"))) == 1
+
+    # A fresh process loads the pickled model instead of refitting
+    def refit(self, categories):
+        raise AssertionError("refitted")
+
+    monkeypatch.setattr(category_model, "_models", {})
+    monkeypatch.setattr(category_model.CategoryModel, "__init__", refit)
+    reloaded = get_category_model(str(path))
+    assert reloaded is not first
+    assert np.allclose(reloaded.scores(["water supply"]), first.scores(["water supply"]))
+
+
+class WordEmbedder:
+    """One dimension per word of a tiny vocabulary."""
+
+    VOCABULARY = ["water", "supply", "pipeline", "leak", "power", "cut", "electricity", "tap"]
+
+    def encode(self, texts, **kwargs):
+        return np.array(
+            [[float(word in text.lower()) for word in self.VOCABULARY] for text in texts],
+            dtype=np.float32,
+        )
+
+
+def test_embedding_model_uses_keyword_centroids(workdir, monkeypatch):
+    from subreddit import simitestllm
+
+    # Case texts are embedded lazily through the shared cache and embedder
+    monkeypatch.setattr(simitestllm, "embedder", WordEmbedder())
+    monkeypatch.setattr(simitestllm, "embedding_cache", None)
+    model = EmbeddingCategoryModel.fit(CATEGORIES, simitestllm.encode)
+    assert np.allclose(model.centroids[2], 0)
+
+    best, _ = model.classify(["the tap has no water", "electricity outage"])
+    assert list(best) == [0, 1]
+
+    path = workdir / "data" / "models" / "centroids.npy"
+    model.save(str(path))
+    assert np.allclose(EmbeddingCategoryModel.load(CATEGORIES, str(path)).centroids, model.centroids)
@@ -0,0 +1,99 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from subreddit.embedding_cache import EmbeddingCache, fcntl
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(text), text.count("a"), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_texts_are_encoded_once_and_survive_a_restart(tmp_path):
+    encode = CountingEncoder()
+    cache = EmbeddingCache("model/name", directory=str(tmp_path), memory_entries=2)
+    texts = ["no water", "no power", "no water", "broken road"]
+    first = cache.get_or_compute_many(texts, encode)
+    assert encode.encoded == ["no water", "no power", "broken road"]
+    assert np.array_equal(first[0], first[2])
+
+    reopened = EmbeddingCache("model/name", directory=str(tmp_path))
+    again = reopened.get_or_compute_many(texts, encode)
+    assert len(encode.encoded) == 3
+    assert all(np.array_equal(a, b) for a, b in zip(first, again))
+
+
+def test_on_disk_matrix_grows_past_its_initial_capacity(tmp_path):
+    encode = CountingEncoder()
+    cache = EmbeddingCache("m", directory=str(tmp_path), memory_entries=8)
+    texts = [f"grievance {i}" + "a" * (i % 7) for i in range(2500)]
+    cache.get_or_compute_many(texts, encode)
+
+    reopened = EmbeddingCache("m", directory=str(tmp_path))
+    assert len(reopened) == 2500
+    assert reopened.get(texts[2100])[1] == texts[2100].count("a")
+
+
+def vector(value):
+    return np.full(3, value, dtype=np.float32)
+
+
+def test_two_writers_do_not_overwrite_each_others_rows(tmp_path):
+    # Two handles on one directory behave like two processes
+    first = EmbeddingCache("m", directory=str(tmp_path))
+    second = EmbeddingCache("m", directory=str(tmp_path))
+    first.put("water", vector(1))
+    second.put("power", vector(2))
+    first.put("road", vector(3))
+
+    reopened = EmbeddingCache("m", directory=str(tmp_path))
+    assert [reopened.get(text)[0] for text in ("water", "power", "road")] == [1, 2, 3]
+    # The second writer picked up the first one's row instead of reusing it
+    assert second.get("water")[0] == 1
+
+
+def _write_texts(directory, prefix):
+    cache = EmbeddingCache("m", directory=directory, memory_entries=1)
+    for i in range(200):
+        cache.put(f"{prefix} {i}", vector(float(ord(prefix)) * 1000 + i))
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_concurrent_processes_keep_every_vector(tmp_path):
+    context = multiprocessing.get_context("fork")
+    writers = [
+        context.Process(target=_write_texts, args=(str(tmp_path), prefix)) for prefix in "abcd"
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    cache = EmbeddingCache("m", directory=str(tmp_path))
+    assert len(cache) == 800
+    for prefix in "abcd":
+        for i in (0, 99, 199):
+            assert cache.get(f"{prefix} {i}")[0] == ord(prefix) * 1000 + i
+
+
+def test_keys_without_a_complete_line_or_row_are_ignored(tmp_path):
+    cache = EmbeddingCache("m", directory=str(tmp_path))
+    cache.put("water", vector(1))
+    # A crashed append: a partial key line, then a key past the end of the matrix
+    with open(cache._keys_path, "a") as f:
+        f.write("0123")
+    assert EmbeddingCache("m", directory=str(tmp_path)).get("water")[0] == 1
+
+    writer = EmbeddingCache("m", directory=str(tmp_path))
+    writer.put("power", vector(2))
+    with open(cache._keys_path, "a") as f:
+        f.write("\n" * 2000 + "f" * 40 + "\n")
+    reopened = EmbeddingCache("m", directory=str(tmp_path))
+    assert reopened.get("power")[0] == 2
+    assert len(reopened) == 2
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from components.gazetteer import Gazetteer
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "up_gazetteer.json")
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer.load(DATA)
+
+
+@pytest.mark.parametrize(
+    "pin, up, district",
+    [
+        ("226001", True, "Lucknow"),
+        ("282001", True, "Agra"),
+        ("246701", True, "Bijnor"),  # 2467 overrides the Uttarakhand 246 rule
+        ("246001", False, None),
+        ("248001", False, None),
+        ("110001", False, None),
+    ],
+)
+def test_pin_rules(gazetteer, pin, up, district):
+    assert gazetteer.is_up_pin(pin) is up
+    assert gazetteer.pin_district(pin) == district
+
+
+def test_longest_place_name_wins(gazetteer):
+    found = gazetteer.find("No water in Gomti Nagar, Lucknow")
+    assert [district for _, _, district in found] == ["Lucknow", "Lucknow"]
+    assert gazetteer.first_place("No water in Gomti Nagar, Lucknow") == ("gomti nagar", "Lucknow")
+
+
+def test_locations_resolve_to_districts(gazetteer):
+    assert gazetteer.district("lucknow city") == "Lucknow"
+    assert gazetteer.district("Ward 4, PIN 282001") == "Agra"
+    assert gazetteer.district("Mumbai") is None
+    assert gazetteer.is_up("Hazratganj")
+    assert not gazetteer.is_up("Delhi 110001")
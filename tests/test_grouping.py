@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from components.models import Grievance
+from subreddit import simitestllm
+from subreddit.grouping import GroupingEngine, LocationBucket
+from subreddit.lexical import LexicalModel
+
+from conftest import make_case
+
+
+class FakeEmbedder:
+    """Bag-of-letters vectors: similar texts get similar embeddings."""
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        vectors = []
+        for text in [texts] if single else texts:
+            vector = np.zeros(26, dtype=np.float32)
+            for c in text.lower():
+                if "a" <= c <= "z":
+                    vector[ord(c) - ord("a")] += 1
+            vectors.append(vector)
+        return vectors[0] if single else np.array(vectors)
+
+
+def engine():
+    return GroupingEngine(timedelta(days=2), 0.6, 0.4, 0.2)
+
+
+def test_bucket_term_counts_stay_one_csr_matrix_across_growth_and_removal():
+    lexical = LexicalModel()
+    texts = [f"no water in ward {i} " + "pipe " * (i % 5) for i in range(300)]
+    counts = lexical.term_counts(texts)
+    bucket = LocationBucket(3, lexical.vectorizer.n_features)
+    for i in range(300):
+        bucket.add(str(i), counts[i], float(i), np.ones(3))
+    assert (bucket.term_counts != counts).nnz == 0
+
+    removed = bucket.remove({str(i) for i in range(0, 300, 3)})
+    assert (removed != counts[::3]).nnz == 0
+    keep = [i for i in range(300) if i % 3]
+    assert bucket.case_nos == [str(i) for i in keep]
+    assert (bucket.term_counts[np.array([0, 5])] != counts[[keep[0], keep[5]]]).nnz == 0
+    assert list(bucket.window(-1, 10)) == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_best_match_stays_within_location_and_window():
+    index = engine()
+    embedder = FakeEmbedder()
+    near = make_case("near", location="Lucknow")
+    near["case_detail"] = "No water supply in the colony"
+    far = dict(near, case_no="far", problem_start="2025-05-01 12:00:00")
+    index.add_cases([near, far], embedder.encode([near["case_detail"]] * 2))
+
+    text = "Water supply stopped in our colony"
+    match, score = index.best_match(
+        "lucknow", datetime(2025, 6, 10, 9), text, embedder.encode(text)
+    )
+    assert match == "near" and score > 0.2
+    assert index.best_match("Agra", datetime(2025, 6, 10), text, embedder.encode(text)) == (
+        None,
+        -1,
+    )
+
+
+def test_remove_cases_restores_the_index():
+    index = engine()
+    embedder = FakeEmbedder()
+    kept = make_case("kept")
+    dropped = make_case("dropped")
+    dropped["case_detail"] = "Street lights broken"
+    index.add_case(kept, embedder.encode(kept["case_detail"]))
+    df, n_docs = index.lexical.df.copy(), index.lexical.n_docs
+
+    index.add_case(dropped, embedder.encode(dropped["case_detail"]))
+    index.remove_cases(["dropped"])
+
+    assert index.case_nos == {"kept"}
+    assert index.lexical.n_docs == n_docs
+    assert np.array_equal(index.lexical.df, df)
+    match, _ = index.best_match(
+        "Lucknow",
+        datetime(2025, 6, 9, 12),
+        kept["case_detail"],
+        embedder.encode(kept["case_detail"]),
+    )
+    assert match == "kept"
+
+
+def test_failed_batch_write_leaves_no_phantom_cases(workdir, monkeypatch):
+    monkeypatch.setattr(simitestllm, "embedder", FakeEmbedder())
+    monkeypatch.setattr(simitestllm, "embedding_cache", None)
+    monkeypatch.setattr(simitestllm, "grouping_engine", None)
+    store = simitestllm.get_case_store()
+
+    def failing_add_batch(new_cases, thread_entries):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "add_batch", failing_add_batch)
+    grievance = Grievance("A", "9876543210", "No water", "Lucknow", "2025-06-09 12:00:00")
+    with pytest.raises(OSError):
+        simitestllm.subredditting_batch([grievance])
+    assert len(simitestllm.get_grouping_engine()) == 0
+
+
+def test_cache_hits_do_not_load_the_embedder(workdir, monkeypatch):
+    monkeypatch.setattr(simitestllm, "embedder", None)
+    monkeypatch.setattr(simitestllm, "embedding_cache", None)
+    simitestllm.get_embedding_cache().put("No water", np.ones(26, dtype=np.float32))
+
+    def load_embedder():
+        raise AssertionError("embedder loaded on a cache hit")
+
+    monkeypatch.setattr(simitestllm, "_load_embedder", load_embedder)
+    assert simitestllm.get_local_embedding("No water").shape == (26,)
+
+
+def test_grouping_engine_is_built_once_across_threads(workdir, monkeypatch):
+    monkeypatch.setattr(simitestllm, "grouping_engine", None)
+    built = []
+
+    def build():
+        time.sleep(0.05)
+        built.append(engine())
+        return built[-1]
+
+    monkeypatch.setattr(simitestllm, "_build_grouping_engine", build)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        engines = list(pool.map(lambda _: simitestllm.get_grouping_engine(), range(4)))
+    assert len(built) == 1
+    assert all(e is built[0] for e in engines)
+
+
+def test_first_call_latencies_are_reported_without_warm_up(workdir, monkeypatch, capsys):
+    monkeypatch.setattr(simitestllm, "embedder", None)
+    monkeypatch.setattr(simitestllm, "embedding_cache", None)
+    monkeypatch.setattr(simitestllm, "grouping_engine", None)
+    monkeypatch.setattr(simitestllm, "_load_embedder", FakeEmbedder)
+    monkeypatch.setattr(simitestllm, "_reported", set())
+    grievance = Grievance("A", "9876543210", "No water", "Lucknow", "2025-06-09 12:00:00")
+    simitestllm.subredditting(grievance)
+    out = capsys.readouterr().out
+    assert "[STARTUP] import:" in out and "[STARTUP] embedder:" in out
+
+    # Each timing is reported once
+    simitestllm.subredditting(grievance)
+    assert "[STARTUP]" not in capsys.readouterr().out
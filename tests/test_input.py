@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from components import input as extraction
+from components.input import ExtractionSession, StubBackend, TieredExtractor
+from components.near_duplicate import NearDuplicateIndex
+from components.spam_filtering import HelplineProcessor
+from components.spam_tracker import SubmissionTracker
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class PermissionDenied(Exception):
+    code = 403
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(extraction.time, "sleep", lambda seconds: None)
+    extraction._response_cache.clear()
+
+
+def failing(*errors, reply="{}"):
+    errors = list(errors)
+
+    def generate(prompt, text):
+        if errors:
+            raise errors.pop(0)
+        return reply
+
+    return StubBackend(generate)
+
+
+@pytest.mark.parametrize("error", [TimeoutError(), ServiceUnavailable()])
+def test_transient_errors_are_retried(error):
+    backend = failing(error, reply='{"caller_name": "Ravi"}')
+    assert extraction.request_extraction("prompt", "text", backend) == {"caller_name": "Ravi"}
+    assert backend.calls == 2
+
+
+@pytest.mark.parametrize("error", [PermissionDenied(), ValueError("bad argument")])
+def test_permanent_errors_fail_fast(error):
+    backend = failing(error)
+    with pytest.raises(type(error)):
+        extraction.request_extraction("prompt", "text", backend)
+    assert backend.calls == 1
+
+
+def test_unparseable_replies_are_not_retried():
+    backend = failing(reply="not json")
+    with pytest.raises(json.JSONDecodeError):
+        extraction.request_extraction("prompt", "text", backend)
+    assert backend.calls == 1
+
+
+def test_replies_are_cached_by_prompt():
+    backend = failing(reply='{"location": "Agra"}')
+    for _ in range(3):
+        assert extraction.request_extraction("same prompt", "text", backend)["location"] == "Agra"
+    assert backend.calls == 1
+
+
+def local_processor():
+    return HelplineProcessor(spam_tracker=SubmissionTracker(), duplicate_index=NearDuplicateIndex())
+
+
+COMPLETE = (
+    "My name is Ravi Kumar, phone 9876543210. No water supply in Hazratganj, "
+    "Lucknow for 3 days."
+)
+
+
+def test_tiered_extractor_skips_the_llm_when_local_extraction_is_complete(workdir):
+    backend = failing(reply="{}")
+    extractor = TieredExtractor(local_processor(), backend)
+    data = extractor.extract(COMPLETE)
+    assert data["phone_number"] == "9876543210"
+    assert data["caller_name"] == "Ravi Kumar"
+    assert data["case_detail"] == "No water supply in Hazratganj, Lucknow for 3 days"
+    assert data["questions"] == []
+    assert backend.calls == 0
+    assert extractor.stats["llm_avoided"] == 1
+
+
+def test_tiered_extractor_asks_the_llm_only_for_missing_fields(workdir):
+    reply = json.dumps({"caller_name": "Asha", "location": "Varanasi"})
+    backend = failing(reply=reply)
+    data = TieredExtractor(local_processor(), backend).extract("The road near my house is broken")
+    assert backend.calls == 1
+    assert data["caller_name"] == "Asha"
+    assert data["location"] == "Varanasi"
+    assert "error" not in data
+
+
+def test_tiered_extractor_sends_loose_matches_to_the_llm(workdir):
+    # "I am facing ..." looks like a name to the regexes; only the LLM decides
+    reply = json.dumps({"caller_name": None, "incident_datetime": "since Monday"})
+    backend = failing(reply=reply)
+    data = TieredExtractor(local_processor(), backend).extract(
+        "I am facing a water problem in Hazratganj, phone 9876543210"
+    )
+    assert backend.calls == 1
+    assert data["caller_name"] is None
+    assert "May we have your name for updates?" in data["questions"]
+    assert data["case_detail"] == "I am facing a water problem in Hazratganj, phone 9876543210"
+    assert data["location"] == "Hazratganj"
+
+
+def test_session_fills_fields_across_answers_without_overwriting(workdir):
+    prompts = []
+
+    def reply(prompt, text):
+        prompts.append(prompt)
+        when = "since Monday" if "Monday" in text else None
+        return json.dumps({"caller_name": "Somebody Else", "incident_datetime": when})
+
+    backend = StubBackend(reply)
+    session = ExtractionSession(local_processor(), backend)
+    session.update("My name is Ravi Kumar, phone 9876543210")
+    session.update("No water supply in Hazratganj, Lucknow", "What is the problem?")
+    data = session.update("It started on Monday", "How long has this been ongoing?")
+
+    assert data["caller_name"] == "Ravi Kumar"
+    # The introduction is not taken as the problem; the next answer is
+    assert data["case_detail"] == "No water supply in Hazratganj, Lucknow"
+    assert data["incident_datetime"] == "since Monday"
+    assert data["questions"] == []
+    # Each prompt carries only the latest answer and the fields still missing
+    assert "9876543210" not in prompts[-1]
+    assert '"caller_name"' not in prompts[-1]
+    assert session.stats["turns"] == 3
+
+
+def test_session_takes_a_direct_answer_to_the_question_asked(workdir):
+    session = ExtractionSession(local_processor(), failing(reply="{}"))
+    session.update("My name is Ravi Kumar, phone 9876543210")
+    assert session.fields["grievance"] is None
+
+    # No grievance keyword, but it answers the grievance question
+    session.update("The lane behind my house floods", "Please describe your grievance in brief.")
+    assert session.fields["grievance"] == "The lane behind my house floods"
+
+
+def test_session_reports_backend_errors_and_keeps_state(workdir):
+    session = ExtractionSession(local_processor(), failing(PermissionDenied()))
+    data = session.update("My name is Ravi Kumar, phone 9876543210")
+    assert "error" in data
+    assert session.fields["number"] == "9876543210"
@@ -0,0 +1,27 @@
+import random
+
+from components.keyword_automaton import KeywordAutomaton
+
+GROUPS = {
+    "grievance": ["water", "street light", "pothole", "road", "broad road"],
+    "spam": ["test", "testing", "hi", "मजाक"],
+    "meaningful": ["समस्या", "not working", "king"],
+}
+
+
+def test_matches_agree_with_substring_search():
+    automaton = KeywordAutomaton(GROUPS)
+    rng = random.Random(3)
+    vocabulary = ["water", "street", "light", "broad", "road", "testing", "hi",
+                  "not", "working", "समस्या", "मजाक", "pothole", "x", "kingdom"]
+    for _ in range(500):
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randrange(1, 12)))
+        found = automaton.matches(text.upper())
+        for group, keywords in GROUPS.items():
+            assert found[group] == {k for k in keywords if k in text}, text
+
+
+def test_contains_checks_one_group():
+    automaton = KeywordAutomaton(GROUPS)
+    assert automaton.contains("Testing 123", "spam")
+    assert not automaton.contains("Testing 123", "meaningful")
@@ -0,0 +1,36 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from subreddit.lexical import LexicalModel
+
+CORPUS = [
+    "No water supply in the colony for three days",
+    "Street light broken near the temple",
+    "Water pipeline burst on the main road",
+    "Garbage not collected in ward five",
+    "Power cut every evening in the colony",
+]
+QUERY = "water supply cut in the colony"  # every term occurs in the corpus
+
+
+def test_similarities_match_a_tfidf_vectorizer_fitted_on_the_corpus():
+    model = LexicalModel()
+    model.add_documents(model.term_counts(CORPUS))
+    ours = model.similarities(model.term_counts([QUERY]), model.term_counts(CORPUS))
+
+    reference = TfidfVectorizer().fit(CORPUS)
+    expected = cosine_similarity(
+        reference.transform(CORPUS), reference.transform([QUERY])
+    ).ravel()
+    assert np.allclose(ours, expected)
+
+
+def test_statistics_grow_incrementally():
+    whole = LexicalModel()
+    whole.add_documents(whole.term_counts(CORPUS))
+    parts = LexicalModel()
+    for text in CORPUS:
+        parts.add_documents(parts.term_counts([text]))
+    assert parts.n_docs == whole.n_docs
+    assert np.array_equal(parts.df, whole.df)
@@ -0,0 +1,71 @@
+from components.near_duplicate import NearDuplicateIndex
+
+MESSAGE = "The water supply in ward 12 has been cut for three days please restore it now"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_flags_the_whole_cluster_when_it_becomes_a_campaign():
+    index = NearDuplicateIndex(min_callers=3, clock=Clock())
+    assert not index.is_campaign(MESSAGE, "111")
+    assert not index.is_campaign(MESSAGE.upper() + "!", "222")
+    assert index.campaign_numbers() == set()
+
+    check = index.check(MESSAGE.replace("12", "14"), "333")
+    assert check.campaign
+    assert check.callers == {"111", "222", "333"}
+    assert index.campaign_numbers() == {"111", "222", "333"}
+
+
+def test_unrelated_messages_are_not_grouped():
+    index = NearDuplicateIndex(min_callers=2, clock=Clock())
+    index.add(MESSAGE, "111")
+    assert index.add("Street light near the temple is broken since Monday", "222") == {"222"}
+
+
+def test_later_copies_of_a_flagged_cluster_stay_campaigns():
+    clock = Clock()
+    index = NearDuplicateIndex(min_callers=3, window=100, clock=clock)
+    for number in ("111", "222"):
+        index.add(MESSAGE, number)
+    clock.now = 50
+    assert index.is_campaign(MESSAGE, "333")
+    # The first two age out; the flagged copy still marks new ones
+    clock.now = 120
+    assert index.is_campaign(MESSAGE, "444")
+    clock.now = 500
+    assert index.campaign_numbers() == set()
+    assert not index.is_campaign(MESSAGE, "555")
+
+
+def test_same_issue_reports_in_callers_own_words_are_not_a_campaign():
+    # A neighbourhood outage: many callers, similar words, none a copy
+    reports = [
+        "My name is Asha, there is no water in Hazratganj since morning",
+        "My name is Ravi, there is no water in Hazratganj since morning please help",
+        "This is Sunil, no water in Hazratganj since morning",
+        "My name is Meena and there is no water in Hazratganj since this morning",
+        "Hello, my name is Arif, there is no water in Hazratganj since morning",
+        "My name is Pooja, there is no water in Hazratganj since morning, kindly check",
+    ]
+    index = NearDuplicateIndex(clock=Clock())
+    for number, report in enumerate(reports):
+        assert not index.is_campaign(report, str(number))
+    assert index.campaign_numbers() == set()
+
+
+def test_short_messages_and_slow_copies_are_not_campaigns():
+    clock = Clock()
+    index = NearDuplicateIndex(min_callers=3, burst=600, window=10000, clock=clock)
+    for number in ("111", "222", "333"):
+        assert not index.is_campaign("No water in Hazratganj", number)
+    # The same long message, but one caller every half hour
+    for number in ("444", "555", "666"):
+        clock.now += 1800
+        assert not index.is_campaign(MESSAGE, number)
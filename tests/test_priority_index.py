@@ -0,0 +1,43 @@
+import random
+
+from components.priority_index import PriorityIndex
+
+
+def brute_force(scores, department=None):
+    ranked = [
+        (case_no, score)
+        for case_no, (dept, score) in scores.items()
+        if department is None or dept == department
+    ]
+    return sorted(ranked, key=lambda item: -item[1])
+
+
+def test_top_k_matches_a_full_sort_after_rescoring_and_closing():
+    rng = random.Random(7)
+    index = PriorityIndex()
+    scores = {}
+    for step in range(3000):
+        case_no = f"C{rng.randrange(400)}"
+        if rng.random() < 0.1:
+            index.update(case_no, "Water", 1.0, status="closed")
+            scores.pop(case_no, None)
+        else:
+            dept = rng.choice(["Water", "Power", "Roads"])
+            score = rng.random() * 2
+            index.update(case_no, dept, score)
+            scores[case_no] = (dept, score)
+
+    assert len(index) == len(scores)
+    assert [s for _, s in index.top_k(k=25)] == [s for _, s in brute_force(scores)[:25]]
+    assert [c for c, _ in index.top_k("Power", 10)] == [
+        c for c, _ in brute_force(scores, "Power")[:10]
+    ]
+    assert list(index.iter_cases("Roads", page=8)) == brute_force(scores, "Roads")
+
+
+def test_unscored_cases_are_not_indexed():
+    index = PriorityIndex()
+    index.update("A", "Water", None)
+    index.update("B", "Water", 0.5)
+    assert "A" not in index
+    assert index.top_k("Water") == [("B", 0.5)]
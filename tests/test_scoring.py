@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from components.case_store import JournaledCaseStore, get_case_store
+from components.scoring import scoring
+
+from conftest import make_case, make_entry
+
+
+def write_categories(workdir, categories):
+    (workdir / "data" / "categories_data.json").write_text(json.dumps(categories))
+
+
+def test_scores_only_change_with_threads_or_classifier(workdir):
+    write_categories(
+        workdir,
+        [
+            {"name": "Water", "semantic_weight": 5.0, "keywords": ["water", "pipeline"]},
+            {"name": "Power", "semantic_weight": 5.0, "keywords": ["electricity", "power cut"]},
+        ],
+    )
+    store = get_case_store("json")
+    water = make_case("W", thread=[make_entry()])
+    water["case_detail"] = "No water in the pipeline"
+    power = make_case("P", thread=[make_entry(), make_entry()])
+    power["case_detail"] = "Power cut and no electricity"
+    store.add_batch([water, power], [])
+
+    scoring()
+    assert store.get("W")["case_category"] == "water"
+    assert store.get("P")["case_category"] == "power"
+    assert store.get("P")["score"] > store.get("W")["score"]
+    first_key = store.get("W")["score_model"]
+
+    # Swap the keywords: existing cases must be recategorized
+    write_categories(
+        workdir,
+        [
+            {"name": "Water", "semantic_weight": 5.0, "keywords": ["electricity", "power cut"]},
+            {"name": "Power", "semantic_weight": 5.0, "keywords": ["water", "pipeline"]},
+        ],
+    )
+    scoring()
+    assert store.get("W")["case_category"] == "power"
+    assert store.get("W")["score_model"] != first_key
+
+
+def new_process(monkeypatch):
+    # A fresh store singleton, as a new process would build
+    from components import case_store
+
+    monkeypatch.setattr(case_store, "_stores", {})
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_a_new_process_rescoring_an_unchanged_archive_writes_nothing(
+    workdir, monkeypatch, backend
+):
+    monkeypatch.setattr("components.case_store.CASE_STORE_BACKEND", backend)
+    store = get_case_store()
+    store.add_batch([make_case("A", thread=[make_entry()]), make_case("B")], [])
+    scoring()
+    journal = workdir / "data" / "test.journal.jsonl"
+    written = journal.stat().st_size if backend == "json" else None
+
+    new_process(monkeypatch)
+    store = get_case_store()
+    assert store.dirty_case_nos() == set()
+    scoring()
+    if backend == "json":
+        assert journal.stat().st_size == written
+
+    # Another entry, appended by a process that did not score, is picked up
+    store.append_thread("B", make_entry())
+    new_process(monkeypatch)
+    store = get_case_store()
+    assert store.dirty_case_nos() == {"B"}
+    scoring()
+    assert store.get("B")["score_threads"] == 1
+    assert store.get("A")["score"] == store.get("B")["score"]
+
+
+def test_compaction_keeps_the_scoring_state(workdir):
+    store = get_case_store("json")
+    store.add_case(make_case("A", thread=[make_entry()]))
+    scoring()
+    state = store.scoring_state()
+    store.compact()
+
+    reopened = JournaledCaseStore()
+    assert reopened.scoring_state() == state
+    assert reopened.dirty_case_nos() == set()
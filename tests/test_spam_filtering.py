@@ -0,0 +1,74 @@
+import itertools
+
+import pytest
+
+from components.near_duplicate import NearDuplicateIndex
+from components.spam_filtering import HelplineProcessor
+from components.spam_tracker import SubmissionTracker
+
+
+def processor(**kwargs):
+    kwargs.setdefault("spam_tracker", SubmissionTracker())
+    kwargs.setdefault("duplicate_index", NearDuplicateIndex())
+    return HelplineProcessor(**kwargs)
+
+
+def test_unknown_nlp_backend_is_rejected(workdir):
+    with pytest.raises(ValueError, match="regex, spacy, transformer"):
+        processor(nlp_backend="spacey")
+
+
+def test_regex_backend_extracts_a_grievance(workdir):
+    grievance = processor(nlp_backend="regex").process(
+        "My name is Ravi Kumar, phone 9876543210. There is no water supply "
+        "in Hazratganj, Lucknow for 3 days."
+    )
+    assert grievance is not None
+    assert grievance.caller_phone_no.endswith("9876543210")
+    assert grievance.location == "Hazratganj"
+
+
+def test_an_empty_tracker_passed_in_is_used(workdir):
+    tracker = SubmissionTracker()
+    assert processor(spam_tracker=tracker).spam_tracker is tracker
+
+
+def test_an_empty_duplicate_index_passed_in_is_used(workdir):
+    index = NearDuplicateIndex()
+    assert processor(duplicate_index=index).duplicate_index is index
+
+
+TRANSCRIPTS = [
+    "My name is Ravi Kumar, phone 9876543210. No water supply in Hazratganj, Lucknow for 3 days.",
+    "test",
+    "This is Sita from Agra, 9123456780. The street light is broken since yesterday.",
+    "hello hello hello hello hello",
+    "I am Mohan, 9988776655, road pothole in Mumbai for 2 weeks.",
+] * 4
+
+
+def test_process_many_matches_a_sequential_loop(workdir):
+    sequential = processor()
+    expected = [sequential.process(text) for text in TRANSCRIPTS]
+    assert None in expected and any(expected)
+    assert processor().process_many(TRANSCRIPTS, workers=2, chunksize=3) == expected
+    # Workers use private trackers, never the shared snapshot under data/
+    assert not (workdir / "data" / "spam_tracker.json").exists()
+
+
+def test_iter_process_reads_its_input_lazily(workdir):
+    endless = itertools.cycle(TRANSCRIPTS)
+    results = processor().iter_process(endless, workers=2, chunksize=2)
+    assert len(list(itertools.islice(results, 7))) == 7
+    results.close()
+
+
+def test_neighbours_reporting_the_same_outage_are_kept(workdir):
+    p = processor()
+    names = ["Asha", "Ravi", "Sunil", "Meena", "Arif", "Pooja", "Kiran"]
+    for i, name in enumerate(names):
+        grievance = p.process(
+            f"My name is {name}, phone 98765432{i:02d}. There is no water supply "
+            "in Hazratganj, Lucknow for 2 days."
+        )
+        assert grievance is not None, name
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from components.spam_tracker import SubmissionTracker
+
+from conftest import ROOT
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keeps_a_window_per_number_and_expires_idle_numbers():
+    clock = Clock()
+    tracker = SubmissionTracker(window=3, ttl=60, clock=clock)
+    for i in range(5):
+        recent = tracker.record("111", f"msg {i}")
+    assert recent == ["msg 2", "msg 3", "msg 4"]
+    assert tracker.entries == 3
+
+    clock.now += 61
+    tracker.record("222", "other")
+    assert "111" not in tracker
+    assert tracker.entries == 1
+
+
+def test_evicts_least_recent_numbers_beyond_max_entries():
+    tracker = SubmissionTracker(window=2, max_entries=4, clock=Clock())
+    for number in ("a", "b", "c"):
+        tracker.record(number, "x")
+        tracker.record(number, "y")
+    assert "a" not in tracker
+    assert tracker.entries == 4
+
+
+def test_periodic_snapshots_are_written_off_the_record_path(tmp_path):
+    path = tmp_path / "tracker.json"
+    tracker = SubmissionTracker(snapshot_path=str(path), snapshot_every=10)
+    for i in range(10):
+        tracker.record(f"9{i:09d}", "hello")
+
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(json.loads(path.read_text())["numbers"]) == 10
+
+    reloaded = SubmissionTracker(snapshot_path=str(path))
+    assert reloaded.recent("9000000003") == ["hello"]
+
+
+def test_close_saves_records_below_the_snapshot_interval(tmp_path):
+    path = tmp_path / "tracker.json"
+    tracker = SubmissionTracker(snapshot_path=str(path))
+    tracker.record("9876543210", "no water")
+    assert not path.exists()
+
+    tracker.close()
+    assert SubmissionTracker(snapshot_path=str(path)).recent("9876543210") == ["no water"]
+
+
+def test_the_shared_tracker_is_saved_at_exit(workdir):
+    script = (
+        "from components.spam_tracker import get_submission_tracker\n"
+        "get_submission_tracker().record('9876543210', 'no water')\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env, check=True)
+    saved = json.loads((workdir / "data" / "spam_tracker.json").read_text())
+    assert saved["numbers"][0][0] == "9876543210"